@@ -4,6 +4,22 @@
 
 #This import is to show ^ on errors. 
 from strings_with_arrows import *
+import re
+import sys
+import os
+import hashlib
+import marshal
+import gc
+import tempfile
+import codecs
+import io
+import mmap
+import json
+import tracemalloc
+from bisect import bisect_left, bisect_right
+from time import perf_counter, process_time
+import queue
+import threading
 
 #######################################
 # CONSTANTS
@@ -40,6 +56,11 @@ class IllegalCharError(Error):
 class InvalidSyntaxError(Error):
         def __init__(self, pos_start, pos_end, details=''):
                 super().__init__(pos_start, pos_end, 'Invalid Syntax', details)
+
+#This is the syntax error for tokens after PROG_END;. It is only found after the whole program was parsed, so a
+#program that has it stops before the welcome line is written, like it does with an illegal character.
+class TrailingInputError(InvalidSyntaxError):
+        pass
                 
 class RTError(Error):
     def __init__(self, pos_start, pos_end, details, context):
@@ -70,26 +91,79 @@ class RTError(Error):
 #######################################
 
 
+#Positions only keep the offset of the character they point at. The line and column are worked out from the
+#source text when an error is shown, so the lexers do not need to keep track of lines at all. The anchor is an
+#offset on the line the position is on. It is the same as idx, except for the end of a token: a token ends one
+#character after it starts, on the same line, even when it starts on a new line character.
+
+#The offsets of the new lines are found once for every source, the first time a line or column is asked for,
+#and every line after that is found with a binary search.
+
+class Source:
+    __slots__ = ('fn', 'text', 'newline_offsets')
+
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.text = text
+        self.newline_offsets = None
+
+    def newlines(self):
+        if self.newline_offsets is None:
+            self.newline_offsets = [match.start() for match in re.finditer('\n', self.text)]
+        return self.newline_offsets
+
+    #The offset of the last new line before idx, or -1 on the first line.
+    def last_newline(self, idx):
+        newlines = self.newlines()
+        index = bisect_left(newlines, idx)
+        return newlines[index - 1] if index else -1
+
+    #The offset of the first new line at or after idx, or the length of the text after the last line.
+    def next_newline(self, idx):
+        newlines = self.newlines()
+        index = bisect_left(newlines, idx)
+        return newlines[index] if index < len(newlines) else len(self.text)
+
+    def line(self, idx):
+        return bisect_left(self.newlines(), idx)
+
+    def line_start(self, idx):
+        return self.last_newline(max(idx, 0)) + 1
+
+    def column(self, idx, anchor):
+        return idx - self.line_start(anchor)
+
 class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
+    __slots__ = ('idx', 'anchor', 'source')
+
+    def __init__(self, idx, source, anchor=None):
         self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.fn = fn
-        self.ftxt = ftxt
+        self.anchor = idx if anchor is None else anchor
+        self.source = source
 
-    def advance(self, current_char = None):
-        self.idx += 1
-        self.col += 1
+    @property
+    def ln(self):
+        return self.source.line(self.anchor)
+
+    @property
+    def col(self):
+        return self.source.column(self.idx, self.anchor)
 
-        if current_char == '\n':
-            self.ln += 1
-            self.col = 0
+    @property
+    def fn(self):
+        return self.source.fn
 
+    @property
+    def ftxt(self):
+        return self.source.text
+
+    def advance(self):
+        self.idx += 1
+        self.anchor = self.idx
         return self
 
     def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+        return Position(self.idx, self.source, self.anchor)
 
 #######################################
 # TOKENS
@@ -128,17 +202,26 @@ TT_EOF      = '<eof>'
 
 
 
+#A token only keeps its offset and the source it came from, so a large program does not need two Positions for
+#every token. The Positions are made when they are asked for, which is when a node is made or an error is shown.
+
 class Token:
-    def __init__(self, type_, value=None, pos_start=None, pos_end=None):
+    __slots__ = ('type', 'value', 'idx', 'source')
+
+    def __init__(self, type_, value=None, pos_start=None):
         self.type = type_
         self.value = value
         if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
-            
-        if pos_end:
-            self.pos_end = pos_end
+            self.idx = pos_start.idx
+            self.source = pos_start.source
+
+    @property
+    def pos_start(self):
+        return Position(self.idx, self.source)
+
+    @property
+    def pos_end(self):
+        return Position(self.idx + 1, self.source, self.idx)
     
     def __repr__(self):
         if self.value: return f'{self.value}'#f'{self.type} = {self.value}'
@@ -152,12 +235,12 @@ class LexicalAnalyzer:
     def __init__(self, fn, text):
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
+        self.pos = Position(-1, Source(fn, text))
         self.current_char = None
         self.advance()
     
     def advance(self):
-        self.pos.advance(self.current_char)
+        self.pos.advance()
         self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
 
     def make_tokens(self):
@@ -264,6 +347,283 @@ class LexicalAnalyzer:
         else:
             return Token(TT_IDENT,str(word_str),  pos_start=self.pos)
     
+#######################################
+# REGEX LEXER
+#######################################
+
+#This lexer gives the same tokens as the LexicalAnalyzer, with the same positions, but it matches whole tokens
+#with one compiled regular expression instead of looking at one character at a time. Spaces and tabs are taken
+#in front of the token they come before, so they do not need matches of their own. Tokens only get the offset they
+#point at, so the lexer does not keep track of lines.
+
+TOKEN_REGEX = re.compile(r"""
+    [ \t]*
+    (?:
+    (?P<space>\n[ \t\n]*)
+  | (?P<number>[0-9]+(?:\.[0-9]*)?)
+  | (?P<word>[A-Za-z][A-Za-z_]*)
+  | (?P<single>[-+*/();,=])
+  | (?P<colon>:(?:.|\Z))
+  | (?P<illegal>.)
+  | (?P<end>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+SINGLE_CHAR_TYPES = {
+    '+': TT_PLUS,
+    '-': TT_MINUS,
+    '*': TT_MUL,
+    '/': TT_DIV,
+    '(': TT_LPAREN,
+    ')': TT_RPAREN,
+    '=': TT_EQUAL,
+    ';': TT_SCOLON,
+    ',': TT_COMMA,
+}
+
+KEYWORD_TYPES = {
+    'PROG_START': TT_PROGSTART,
+    'PROG_END': TT_PROGEND,
+    'Write': TT_WRITE,
+    'Read': TT_READ,
+}
+
+#The token stream reports an illegal character by raising this exception, because it cannot return an error
+#to the parser that is reading from it.
+
+class LexFailure(Exception):
+    def __init__(self, error):
+        super().__init__(error.details)
+        self.error = error
+
+class RegexLexicalAnalyzer:
+    def __init__(self, fn, text, source=None):
+        self.fn = fn
+        self.text = text
+        self.source = source
+
+    def make_tokens(self):
+        try:
+            return list(self.iter_tokens()), None
+        except LexFailure as failure:
+            return [], failure.error
+
+#This generator gives the tokens one at a time, so the parser can use them as they are made instead of
+#waiting for the whole list. It raises LexFailure when it reaches an illegal character. The tokens can start
+#at any offset of the text, and they can share a Source that is given to the lexer instead of a new one.
+
+    def iter_tokens(self, start=0):
+        source = self.source if self.source is not None else Source(self.fn, self.text)
+        single_char_types = SINGLE_CHAR_TYPES
+        keyword_types = KEYWORD_TYPES
+        idx = start
+
+        #Tokens point at the same place the LexicalAnalyzer points them at: one character for operators, and
+        #the character after the number or word for numbers and words.
+        for match in TOKEN_REGEX.finditer(self.text, start):
+            kind = match.lastgroup
+
+            #The end only moves idx forward, because a colon at the end of the text has already moved it past the end.
+            if kind == 'end':
+                idx = max(idx, match.end())
+                break
+
+            idx = match.end()
+            if kind == 'space':
+                continue
+
+            value = match.group(kind)
+            if kind == 'word':
+                tok = Token(keyword_types.get(value, TT_IDENT), value)
+                tok.idx = idx
+            elif kind == 'single':
+                tok = Token(single_char_types[value])
+                tok.idx = idx - 1
+            elif kind == 'number':
+                if '.' in value: tok = Token(TT_FLOAT, float(value))
+                elif len(value) > 1: tok = Token(TT_INT, int(value))
+                else: tok = Token(TT_DIGIT, int(value))
+                tok.idx = idx
+            elif kind == 'colon':
+                tok = Token(TT_ASSIGN if value == ':=' else TT_COLON)
+                tok.idx = idx - len(value) + 1
+            else:
+                raise LexFailure(IllegalCharError(Position(idx - 1, source), Position(idx, source), "'" + value + "'"))
+
+            tok.source = source
+            yield tok
+
+            #A colon at the end of the text moves one past the end.
+            if kind == 'colon' and value == ':':
+                idx += 1
+
+        tok = Token(TT_EOF)
+        tok.idx = idx
+        tok.source = source
+        yield tok
+    
+#######################################
+# MAPPED LEXER
+#######################################
+
+#This lexer reads a program file through mmap, as bytes, so a very large file is never copied into one str. It
+#gives the same tokens as the RegexLexicalAnalyzer gives for the text of the file. Only the words and numbers are
+#taken out of the bytes, when their tokens are made; int() and float() read the bytes of a number as they are.
+#
+#The offsets of the tokens are offsets in the bytes, so the columns of errors count the characters in front of
+#them on their line. New lines may be written as \n, \r\n, or \r, like open() reads them, and are shown as \n.
+
+BYTES_TOKEN_REGEX = re.compile(rb"""
+    [ \t]*
+    (?:
+    (?P<space>[\r\n][ \t\r\n]*)
+  | (?P<number>[0-9]+(?:\.[0-9]*)?)
+  | (?P<word>[A-Za-z][A-Za-z_]*)
+  | (?P<single>[-+*/();,=])
+  | (?P<colon>:(?:[\xc0-\xff][\x80-\xbf]*|.|\Z))
+  | (?P<illegal>.)
+  | (?P<end>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+BYTES_NEWLINE_REGEX = re.compile(rb'\r\n?|\n')
+
+BYTES_SINGLE_CHAR_TYPES = {char.encode(): type_ for char, type_ in SINGLE_CHAR_TYPES.items()}
+
+#The source of a mapped file finds its new lines in the bytes, and only decodes the lines an error shows. A new
+#line is at its last byte, so the \r of a \r\n ends the line in front of it and is dropped from it.
+
+class MappedText:
+    def __init__(self, source):
+        self.source = source
+
+    def __len__(self):
+        return self.source.size
+
+    def __getitem__(self, key):
+        data = self.source.read(key.start, key.stop)
+        if data.endswith(b'\r') and self.source.read(key.stop, key.stop + 1) == b'\n':
+            data = data[:-1]
+        return data.decode('utf-8', 'replace').replace('\r\n', '\n').replace('\r', '\n')
+
+#The file is only mapped while it is lexed. After that, the bytes an error shows are read from the file again.
+
+class MappedSource(Source):
+    __slots__ = ('data', 'size')
+
+    def __init__(self, fn, data):
+        self.fn = fn
+        self.data = data
+        self.size = len(data)
+        self.newline_offsets = None
+
+    @property
+    def text(self):
+        return MappedText(self)
+
+    def read(self, start, stop):
+        if self.data is not None: return self.data[start:stop]
+        with open(self.fn, 'rb') as file:
+            file.seek(start)
+            return file.read(max(stop - start, 0))
+
+    def newlines(self):
+        if self.newline_offsets is None:
+            if self.data is not None:
+                self.newline_offsets = [match.end() - 1 for match in BYTES_NEWLINE_REGEX.finditer(self.data)]
+            elif self.size:
+                with open(self.fn, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.newline_offsets = [match.end() - 1 for match in BYTES_NEWLINE_REGEX.finditer(data)]
+            else:
+                self.newline_offsets = []
+        return self.newline_offsets
+
+    #The bytes that continue a UTF-8 character are not columns of their own.
+    def column(self, idx, anchor):
+        start = self.line_start(anchor)
+        if idx <= start: return idx - start
+        return idx - start - sum(1 for byte in self.read(start, idx) if 0x80 <= byte < 0xc0)
+
+#The lexer is closed when the file has been lexed, which unmaps it. parse_file() uses it in a with statement.
+
+class MappedLexicalAnalyzer:
+    def __init__(self, fn):
+        self.fn = fn
+        with open(fn, 'rb') as file:
+            #An empty file cannot be mapped.
+            if os.fstat(file.fileno()).st_size:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b''
+        self.source = MappedSource(fn, self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.source.data = None
+        if isinstance(self.data, mmap.mmap): self.data.close()
+
+    def make_tokens(self):
+        try:
+            return list(self.iter_tokens()), None
+        except LexFailure as failure:
+            return [], failure.error
+
+    def iter_tokens(self, start=0):
+        source = self.source
+        data = self.data
+        single_char_types = BYTES_SINGLE_CHAR_TYPES
+        keyword_types = KEYWORD_TYPES
+        idx = start
+
+        for match in BYTES_TOKEN_REGEX.finditer(data, start):
+            kind = match.lastgroup
+
+            if kind == 'end':
+                idx = max(idx, match.end())
+                break
+
+            idx = match.end()
+            if kind == 'space':
+                continue
+
+            value = match.group(kind)
+            if kind == 'word':
+                value = value.decode('ascii')
+                tok = Token(keyword_types.get(value, TT_IDENT), value)
+                tok.idx = idx
+            elif kind == 'single':
+                tok = Token(single_char_types[value])
+                tok.idx = idx - 1
+            elif kind == 'number':
+                if b'.' in value: tok = Token(TT_FLOAT, float(value))
+                elif len(value) > 1: tok = Token(TT_INT, int(value))
+                else: tok = Token(TT_DIGIT, int(value))
+                tok.idx = idx
+            elif kind == 'colon':
+                #The character after a colon can be more than one byte long.
+                tok = Token(TT_ASSIGN if value == b':=' else TT_COLON)
+                tok.idx = match.start(kind) + 1
+            else:
+                #The illegal character can be more than one byte long, and is shown as the character it is.
+                char = data[idx - 1:idx + 3].decode('utf-8', 'replace')[0]
+                raise LexFailure(IllegalCharError(Position(idx - 1, source), Position(idx, source), "'" + char + "'"))
+
+            tok.source = source
+            yield tok
+
+            if kind == 'colon' and value == b':':
+                idx += 1
+
+        tok = Token(TT_EOF)
+        tok.idx = idx
+        tok.source = source
+        yield tok
+
 #######################################
 # NODES
 #######################################
@@ -524,6 +884,19 @@ class StmtsOpNode:
     def __repr__(self):
         return f'{self.left_node}, {self.right_node}'
 
+#A block holds every statement of the program in one flat list, so a long program does not make a deep chain
+#of StmtsOpNodes that would need recursion to run or print.
+
+class BlockNode:
+    def __init__(self, stmts):
+        self.stmts = stmts
+        
+        self.pos_start = self.stmts[0].pos_start
+        self.pos_end = self.stmts[-1].pos_end
+
+    def __repr__(self):
+        return ', '.join(f'{stmt}' for stmt in self.stmts)
+
 class UnaryOpNode:
     def __init__(self, op_tok, node):
         self.op_tok = op_tok
@@ -535,6 +908,64 @@ class UnaryOpNode:
     def __repr__(self):
         return f'{self.op_tok}, {self.node}'
 
+#A constant node is made by the optimizer for a value that is already known before the program runs. The traces
+#are the lines the variable reads inside the folded expression would have written, and they are still written
+#every time the node is run so the output does not change.
+
+class ConstNode:
+    def __init__(self, value, pos_start, pos_end, traces=()):
+        self.value = value
+        self.traces = traces
+        
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
+    def __repr__(self):
+        return f'({self.value})'
+
+#These nodes are made by the SubexpressionEliminator. A TempStoreNode works out its expression and keeps the value
+#in a hidden slot, and a TempNode gives that value again for an expression that was the same. A TempNode still
+#writes the trace lines its expression would have written: a (name, slot) pair is a variable read, and a pair with
+#no slot is a line kept by a ConstNode. Both keep the expression they stand for, with its positions.
+
+class TempStoreNode:
+    def __init__(self, slot, expr):
+        self.slot = slot
+        self.expr = expr
+
+        self.pos_start = expr.pos_start
+        self.pos_end = expr.pos_end
+
+    def __repr__(self):
+        return f'(t{self.slot} = {self.expr})'
+
+class TempNode:
+    def __init__(self, slot, traces, expr):
+        self.slot = slot
+        self.traces = traces
+        self.expr = expr
+
+        self.pos_start = expr.pos_start
+        self.pos_end = expr.pos_end
+
+    def __repr__(self):
+        return f't{self.slot}'
+
+#These functions give the parts of a <varl>: the expressions of a Write in the order they are written, and the
+#variable names of a Read, found from the printed node the same way visit_ReadNode finds them.
+
+def varl_items(node):
+    items = []
+    while isinstance(node, VarlOpNode):
+        items.append(node.right_node)
+        node = node.left_node
+    items.append(node)
+    items.reverse()
+    return items
+
+def read_names(node):
+    return [var_name[1:-1] for var_name in str(node).split(", ")[::2]]
+
 #######################################
 # PARSE RESULT
 #######################################
@@ -565,27 +996,29 @@ class ParseResult:
 
 #The parsing starts from the program function.
 
+#The parser takes a list of tokens or any iterator of tokens, like RegexLexicalAnalyzer.iter_tokens(). It only
+#keeps the current token, so tokens that the parse tree does not need are dropped as soon as they are parsed.
+
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
+        self.tokens = iter(tokens)
         self.tok_idx = -1
         self.advance()
 
     def advance(self, ):
         self.tok_idx += 1
-        if self.tok_idx < len(self.tokens):
-            self.current_tok = self.tokens[self.tok_idx]
+        tok = next(self.tokens, None)
+        if tok is not None:
+            self.current_tok = tok
         return self.current_tok
 
     def parse(self):
         res = self.program()
         if not res.error and self.current_tok.type != TT_EOF:
-            return res.failure(InvalidSyntaxError(
+            return res.failure(TrailingInputError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 "Input Error"
             ))
-        sourceFile = open("DustyDevil+.out.txt", 'w')
-        print('Welcome to the DustyDevil Programming Language! \n', file = sourceFile)
         return res
 
     ###################################
@@ -670,20 +1103,18 @@ class Parser:
             return res.success(StmtNode(res.register(self.assign())))
         
 #This function is made to be able to have many back to back read, write, and assign operators.
+#The statements are kept in one list inside a BlockNode.
         
     def stmtsop(self, func, ops):
         res = ParseResult()
-        left = res.register(func())
+        stmts = [res.register(func())]
         if res.error: return res
 
         while self.current_tok.type in ops:
-            #op_tok = self.current_tok
-            #res.register(self.advance())
-            right = res.register(func())
+            stmts.append(res.register(func()))
             if res.error: return res
-            left = StmtsOpNode(left, right)
 
-        return res.success(left)
+        return res.success(BlockNode(stmts))
   
 #This function returns an Assign node if it contains what it needs according to the BNF Rule.
 #<assign> ->>> <var> := <expr>;    
@@ -929,6 +1360,410 @@ class Parser:
         
         
 
+#######################################
+# OPTIMIZER
+#######################################
+
+#The constant folder is a pass from parse tree to parse tree that runs between the parser and the engines.
+#It folds BinOpNodes and UnaryOpNodes that only have numbers under them into one ConstNode, and it replaces the
+#reads of a variable that is assigned only once, from a constant, with that constant.
+#
+#The new tree has to give the same output and errors as the old one, so:
+#  - a ConstNode has the position the Number made at run time would have had, because a division by zero
+#    points at the position of its divisor's Number;
+#  - a folded read still writes its trace line;
+#  - a division by a constant zero is not folded, so it still fails when the program runs;
+#  - nothing is propagated when a unary + is used on a variable, because visit_UnaryOpNode moves the position
+#    of the Number that is stored in the variable.
+
+class ConstantFolder:
+    def fold(self, node):
+        self.assign_counts = {}
+        self.propagate = True
+        self.constants = {}
+        self.folded = 0
+        self.propagated = 0
+        self.count_assignments(node)
+        return self.visit(node)
+
+    def count_assignments(self, node):
+        for stmt in node.op_tok4.stmts:
+            stmt = stmt.tok
+            if isinstance(stmt, AssignNode):
+                var_name = str(stmt.op_tok)[1:-1]
+                self.assign_counts[var_name] = self.assign_counts.get(var_name, 0) + 1
+                self.check_unary(stmt.op_tok3)
+            elif isinstance(stmt, ReadNode):
+                for var_name in read_names(stmt.op_tok3):
+                    self.assign_counts[var_name] = self.assign_counts.get(var_name, 0) + 2
+            elif isinstance(stmt, WriteNode):
+                for item in varl_items(stmt.op_tok3):
+                    self.check_unary(item)
+
+    def check_unary(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinOpNode):
+                stack.append(node.left_node)
+                stack.append(node.right_node)
+            elif isinstance(node, UnaryOpNode):
+                if node.op_tok.type != TT_MINUS and isinstance(node.node, (VarNode, UnaryOpNode)):
+                    inner = node.node
+                    while isinstance(inner, UnaryOpNode) and inner.op_tok.type != TT_MINUS:
+                        inner = inner.node
+                    if isinstance(inner, VarNode): self.propagate = False
+                stack.append(node.node)
+
+    def visit(self, node):
+        method_name = f'fold_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_fold_method)
+        return method(node)
+
+    def no_fold_method(self, node):
+        return node
+
+    #The new node keeps the positions of the node it replaces, even when its children moved.
+    def keep_pos(self, new_node, node):
+        new_node.pos_start = node.pos_start
+        new_node.pos_end = node.pos_end
+        return new_node
+
+    #This gives the value and traces of a node that is a constant, or None when it is not.
+    def constant(self, node):
+        if isinstance(node, NumberNode): return node.tok.value, ()
+        if isinstance(node, ConstNode): return node.value, node.traces
+        return None
+
+    ###################################
+
+    def fold_ProgramNode(self, node):
+        return self.keep_pos(ProgramNode(node.op_tok, node.op_tok2, node.op_tok3, self.visit(node.op_tok4),
+                                         node.op_tok5, node.op_tok6), node)
+
+    def fold_BlockNode(self, node):
+        return self.keep_pos(BlockNode([self.visit(stmt) for stmt in node.stmts]), node)
+
+    def fold_StmtNode(self, node):
+        return self.keep_pos(StmtNode(self.visit(node.tok)), node)
+
+    def fold_AssignNode(self, node):
+        expr = self.visit(node.op_tok3)
+        var_name = str(node.op_tok)[1:-1]
+
+        if self.propagate and self.assign_counts.get(var_name) == 1:
+            constant = self.constant(expr)
+            if constant is not None:
+                self.constants[var_name] = (constant[0], expr.pos_start, expr.pos_end)
+
+        return self.keep_pos(AssignNode(node.op_tok, node.op_tok2, expr, node.op_tok4), node)
+
+    def fold_WriteNode(self, node):
+        return self.keep_pos(WriteNode(node.op_tok, node.op_tok2, self.visit(node.op_tok3), node.op_tok4,
+                                       node.op_tok5), node)
+
+    def fold_VarlOpNode(self, node):
+        return self.keep_pos(VarlOpNode(self.visit(node.left_node), node.op_tok, self.visit(node.right_node)), node)
+
+    def fold_VarNode(self, node):
+        var_name = node.var_name_tok.value
+        if var_name not in self.constants: return node
+
+        value, pos_start, pos_end = self.constants[var_name]
+        self.propagated += 1
+        return ConstNode(value, pos_start, pos_end, (f'{var_name} = {value}',))
+
+    def fold_BinOpNode(self, node):
+        left = self.visit(node.left_node)
+        right = self.visit(node.right_node)
+        left_constant = self.constant(left)
+        right_constant = self.constant(right)
+
+        if left_constant is not None and right_constant is not None:
+            left_value, left_traces = left_constant
+            right_value, right_traces = right_constant
+            op_type = node.op_tok.type
+
+            if op_type == TT_PLUS: value = left_value + right_value
+            elif op_type == TT_MINUS: value = left_value - right_value
+            elif op_type == TT_MUL: value = left_value * right_value
+            elif right_value != 0: value = left_value / right_value
+            else: value = None
+
+            if value is not None:
+                self.folded += 1
+                return ConstNode(value, node.pos_start, node.pos_end, left_traces + right_traces)
+
+        return self.keep_pos(BinOpNode(left, node.op_tok, right), node)
+
+    def fold_UnaryOpNode(self, node):
+        operand = self.visit(node.node)
+        constant = self.constant(operand)
+
+        if constant is not None:
+            value, traces = constant
+            if node.op_tok.type == TT_MINUS: value = value * -1
+            self.folded += 1
+            return ConstNode(value, node.pos_start, node.pos_end, traces)
+
+        return self.keep_pos(UnaryOpNode(node.op_tok, operand), node)
+
+
+#######################################
+# RESOLVER
+#######################################
+
+#The resolver gives every variable name in the program a slot number, in the order the names first show up.
+#It writes the slot on every VarNode (the target of an AssignNode is a VarNode too), and the names and slots on
+#every ReadNode, and it keeps the list of names on the ProgramNode as slot_names. The engines then keep the
+#variables in a list indexed by slot, and only use the names to write traces and errors. The hidden slots the
+#SubexpressionEliminator adds come after the named ones, and temp_count on the ProgramNode says how many there are.
+
+class Resolver:
+    def __init__(self):
+        self.slots = {}
+        self.names = []
+
+    def resolve(self, node):
+        self.slots = {}
+        self.names = []
+        for stmt in node.op_tok4.stmts:
+            self.visit(stmt.tok)
+        node.slot_names = self.names
+        node.temp_count = 0
+        return node
+
+    def slot(self, var_name):
+        if var_name not in self.slots:
+            self.slots[var_name] = len(self.names)
+            self.names.append(var_name)
+        return self.slots[var_name]
+
+    def visit(self, node):
+        method_name = f'resolve_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_resolve_method)
+        return method(node)
+
+    def no_resolve_method(self, node):
+        pass
+
+    ###################################
+
+    def resolve_AssignNode(self, node):
+        self.visit(node.op_tok3)
+        self.visit(node.op_tok)
+
+    def resolve_WriteNode(self, node):
+        self.visit(node.op_tok3)
+
+    def resolve_ReadNode(self, node):
+        node.var_names = read_names(node.op_tok3)
+        node.slots = [self.slot(var_name) for var_name in node.var_names]
+
+    def resolve_VarlOpNode(self, node):
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def resolve_BinOpNode(self, node):
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def resolve_UnaryOpNode(self, node):
+        self.visit(node.node)
+
+    def resolve_VarNode(self, node):
+        node.slot = self.slot(node.var_name_tok.value)
+
+
+#######################################
+# SUBEXPRESSIONS
+#######################################
+
+#The subexpression eliminator is a pass from resolved tree to resolved tree that runs after the Resolver when
+#optimize is on. It finds BinOpNodes that are the same as one worked out before them, with none of their
+#variables given a new value in between by an assignment or a Read. The first one is worked out once into a
+#hidden slot with a TempStoreNode, and the others become TempNodes that give the value from that slot.
+#
+#The program has no loops or branches, so a node that comes first in the text is worked out first, and when it
+#fails the program stops before any TempNode for it is reached. The new tree has to give the same output and
+#errors as the old one, so:
+#  - two expressions are the same only when every number in them is written the same, so 2 and 2.0 are not;
+#  - a TempNode writes the trace lines its expression would have written, in the same order;
+#  - a TempNode makes its Number with its own position and with the context its expression would have given;
+#  - nothing under a unary + of a variable is kept, because visit_UnaryOpNode moves the position of the Number
+#    that is stored in the variable.
+#
+#temporaries is the number of hidden slots made, and removed is the number of operators that are not worked out
+#again because of them.
+
+class SubexpressionEliminator:
+    def eliminate(self, node):
+        self.base = len(node.slot_names)
+        self.keys = {}
+        self.available = {}
+        self.watchers = {}
+        self.temps = {}
+        self.replaced = {}
+        self.temporaries = 0
+        self.removed = 0
+
+        for stmt in node.op_tok4.stmts:
+            self.scan(stmt.tok)
+        if not self.temps: return node
+
+        self.temporaries = len(self.temps)
+        new_node = self.visit(node)
+        new_node.slot_names = node.slot_names
+        new_node.temp_count = node.temp_count + self.temporaries
+        return new_node
+
+    #This gives the key of an expression and the names of its variables, or None when it cannot be kept. Two
+    #expressions with the same key give the same value, output, and errors.
+    def key(self, node):
+        if id(node) in self.keys: return self.keys[id(node)]
+
+        found = None
+        if isinstance(node, BinOpNode):
+            left = self.key(node.left_node)
+            right = self.key(node.right_node)
+            if left is not None and right is not None:
+                found = (('bin', node.op_tok.type, left[0], right[0]), left[1] | right[1])
+        elif isinstance(node, UnaryOpNode):
+            inner = self.key(node.node)
+            if inner is not None and not unary_moves_number(node):
+                found = (('unary', node.op_tok.type, inner[0]), inner[1])
+        elif isinstance(node, VarNode):
+            found = (('var', node.var_name_tok.value), frozenset((node.var_name_tok.value,)))
+        elif isinstance(node, NumberNode):
+            found = (('number', repr(node.tok.value)), frozenset())
+        elif isinstance(node, ConstNode):
+            found = (('const', repr(node.value), node.traces), frozenset())
+
+        self.keys[id(node)] = found
+        return found
+
+    #The statements are scanned in the order they run. A variable that gets a new value makes every expression
+    #that reads it unavailable.
+    def scan(self, node):
+        if isinstance(node, AssignNode):
+            self.scan_expr(node.op_tok3)
+            self.kill(node.op_tok.var_name_tok.value)
+        elif isinstance(node, ReadNode):
+            for var_name in node.var_names:
+                self.kill(var_name)
+        elif isinstance(node, WriteNode):
+            for item in varl_items(node.op_tok3):
+                self.scan_expr(item)
+
+    def kill(self, var_name):
+        for key in self.watchers.pop(var_name, ()):
+            self.available.pop(key, None)
+
+    #The operands of an expression are worked out before it, so they are scanned before it is made available.
+    #An expression that is already available is not scanned inside, because none of it is worked out again.
+    def scan_expr(self, node):
+        if isinstance(node, UnaryOpNode):
+            self.scan_expr(node.node)
+        if not isinstance(node, BinOpNode): return
+
+        key = self.key(node)
+        if key is not None:
+            first = self.available.get(key[0])
+            if first is not None:
+                slot = self.temps.get(id(first))
+                if slot is None: slot = self.temps[id(first)] = self.base + len(self.temps)
+                self.replaced[id(node)] = slot
+                self.removed += self.operations(node)
+                return
+
+        self.scan_expr(node.left_node)
+        self.scan_expr(node.right_node)
+        if key is not None:
+            self.available[key[0]] = node
+            for var_name in key[1]:
+                self.watchers.setdefault(var_name, []).append(key[0])
+
+    def operations(self, node):
+        count = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinOpNode):
+                count += 1
+                stack.append(node.left_node)
+                stack.append(node.right_node)
+            elif isinstance(node, UnaryOpNode):
+                count += 1
+                stack.append(node.node)
+        return count
+
+    #This gives the trace lines of an expression in the order it writes them.
+    def traces(self, node):
+        traces = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinOpNode):
+                stack.append(node.right_node)
+                stack.append(node.left_node)
+            elif isinstance(node, UnaryOpNode):
+                stack.append(node.node)
+            elif isinstance(node, VarNode):
+                traces.append((node.var_name_tok.value, node.slot))
+            elif isinstance(node, ConstNode):
+                traces.extend((line, None) for line in node.traces)
+        return tuple(traces)
+
+    def visit(self, node):
+        method_name = f'rewrite_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_rewrite_method)
+        return method(node)
+
+    def no_rewrite_method(self, node):
+        return node
+
+    def keep_pos(self, new_node, node):
+        new_node.pos_start = node.pos_start
+        new_node.pos_end = node.pos_end
+        return new_node
+
+    ###################################
+
+    def rewrite_ProgramNode(self, node):
+        return self.keep_pos(ProgramNode(node.op_tok, node.op_tok2, node.op_tok3, self.visit(node.op_tok4),
+                                         node.op_tok5, node.op_tok6), node)
+
+    def rewrite_BlockNode(self, node):
+        return self.keep_pos(BlockNode([self.visit(stmt) for stmt in node.stmts]), node)
+
+    def rewrite_StmtNode(self, node):
+        return self.keep_pos(StmtNode(self.visit(node.tok)), node)
+
+    def rewrite_AssignNode(self, node):
+        return self.keep_pos(AssignNode(node.op_tok, node.op_tok2, self.visit(node.op_tok3), node.op_tok4), node)
+
+    def rewrite_WriteNode(self, node):
+        return self.keep_pos(WriteNode(node.op_tok, node.op_tok2, self.visit(node.op_tok3), node.op_tok4,
+                                       node.op_tok5), node)
+
+    def rewrite_VarlOpNode(self, node):
+        return self.keep_pos(VarlOpNode(self.visit(node.left_node), node.op_tok, self.visit(node.right_node)),
+                             node)
+
+    def rewrite_BinOpNode(self, node):
+        slot = self.replaced.get(id(node))
+        if slot is not None: return TempNode(slot, self.traces(node), node)
+
+        new_node = self.keep_pos(BinOpNode(self.visit(node.left_node), node.op_tok, self.visit(node.right_node)),
+                                 node)
+        slot = self.temps.get(id(node))
+        if slot is not None: return TempStoreNode(slot, new_node)
+        return new_node
+
+    def rewrite_UnaryOpNode(self, node):
+        return self.keep_pos(UnaryOpNode(node.op_tok, self.visit(node.node)), node)
+
+
 #######################################
 # RUNTIME RESULT
 #######################################
@@ -1007,16 +1842,190 @@ class Number:
         return str(self.value)
 
 
+#This value holds the results of the statements in a block. It prints them the same way a chain of
+#StmtsOpNodes prints them.
+
+class ValueList:
+    def __init__(self, elements):
+        self.elements = elements
+
+    def __repr__(self):
+        return ', '.join(f'{element}' for element in self.elements)
+
+
 #######################################
 # CONTEXT
 #######################################
 
+#The engines make the Numbers of a run with context.number, which is Number unless the run counts them for Stats.
+
 class Context:
     def __init__(self, display_name, parent=None, parent_entry_pos=None):
         self.display_name = display_name
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
         self.symbol_table = None
+        self.slots = None
+        self.output = None
+        self.input = None
+        self.number = Number
+
+#######################################
+# OUTPUT
+#######################################
+
+#The output sinks are where a program writes its lines. Every sink has write, flush, and close, and write takes
+#one line without the new line at the end. run() writes to the sink it is given and flushes it when it is done,
+#but closing the sink is left to whoever made it.
+
+class StdoutSink:
+    def write(self, line):
+        sys.stdout.write(line + '\n')
+
+    def flush(self):
+        sys.stdout.flush()
+
+    def close(self):
+        self.flush()
+
+#This sink keeps the lines in a list, which is useful to check the output of a program from python.
+
+class MemorySink:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(line + '\n' for line in self.lines)
+
+#This sink opens its file only once and lets python buffer the writes. flush_every is the flush policy: the file
+#is flushed after that many lines, or only by flush() and close() when it is 0.
+
+class FileSink:
+    def __init__(self, path, mode='w', flush_every=0, buffering=-1):
+        self.file = open(path, mode, buffering=buffering)
+        self.flush_every = flush_every
+        self.pending = 0
+
+    def write(self, line):
+        self.file.write(line + '\n')
+        if self.flush_every:
+            self.pending += 1
+            if self.pending >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+#This sink sends every line to all of its sinks, like the file and the screen in shell.py.
+
+class TeeSink:
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, line):
+        for sink in self.sinks:
+            sink.write(line)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+#This sink counts the lines it gives to another sink. Every variable a program reads writes one line, so the
+#Stats of a run use it to count the reads.
+
+class CountingSink:
+    def __init__(self, sink):
+        self.sink = sink
+        self.lines = 0
+
+    def write(self, line):
+        self.lines += 1
+        self.sink.write(line)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+#This sink gives the lines to a background thread that writes them to another sink, so the program does not
+#wait for slow writes. flush() waits until the thread has written every line that was given before it.
+
+class ThreadedSink:
+    def __init__(self, sink, max_pending=0):
+        self.sink = sink
+        self.lines = queue.Queue(max_pending)
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    def writer(self):
+        while True:
+            line = self.lines.get()
+            if line is None:
+                self.lines.task_done()
+                return
+            self.sink.write(line)
+            self.lines.task_done()
+
+    def write(self, line):
+        self.lines.put(line)
+
+    def flush(self):
+        self.lines.join()
+        self.sink.flush()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.lines.put(None)
+            self.thread.join()
+        self.sink.close()
+
+#This sink is for run_async(). The program writes its lines without waiting, and they are kept until drain()
+#awaits the writer for each of them, which run_async() does every time the program stops for a Read or a Write.
+
+class AsyncSink:
+    def __init__(self, writer):
+        self.writer = writer
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def drain(self):
+        lines = self.lines
+        self.lines = []
+        for line in lines:
+            await self.writer(line)
 
 #######################################
 # SYMBOL TABLE
@@ -1039,6 +2048,17 @@ class SymbolTable:
     def remove(self, name):
         del self.symbols[name]
 
+#Programs keep their variables in a list of slots while they run. These functions fill the slots from the
+#table before a run and put the values back into the table after it.
+
+    def load(self, names):
+        return [self.get(name) for name in names]
+
+    def store(self, names, slots):
+        for name, value in zip(names, slots):
+            if value is not None:
+                self.set(name, value)
+
 #######################################
 # INTERPRETER
 #######################################
@@ -1087,7 +2107,19 @@ class Interpreter:
         left = StmtsOpNode(left, right)
         
         return res.success(left)#.set_pos(node.pos_start, node.pos_end))
-        
+
+#The statements of a block are run one after the other in a loop, so the number of statements does not
+#matter for python recursion.
+
+    def visit_BlockNode(self, node, context):
+        res = RTResult()
+        values = []
+
+        for stmt in node.stmts:
+            values.append(res.register(self.visit(stmt, context)))
+            if res.error: return res
+
+        return res.success(ValueList(values))
         
         
     def visit_StmtNode(self, node, context):
@@ -1101,16 +2133,23 @@ class Interpreter:
 
     def visit_NumberNode(self, node, context):
         return RTResult().success(
-            Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+            context.number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
         )
 
 
+    def visit_ConstNode(self, node, context):
+        for line in node.traces:
+            context.output.write(line)
+        return RTResult().success(
+            context.number(node.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+        )
+
     def visit_VarNode(self, node, context):
         res = RTResult()
         var_name = node.var_name_tok.value
         
         
-        value = global_symbol_table.get(var_name)
+        value = context.slots[node.slot]
         
         if not value:
             return res.failure(RTError(
@@ -1120,9 +2159,7 @@ class Interpreter:
             ))
 
         #value = value.copy().set_pos(node.pos_start, node.pos_end)
-        sourceFile = open("DustyDevil+.out.txt", 'a')
-        print(f'{var_name} = {value}', file = sourceFile)
-        print(f'{var_name} = {value}')
+        context.output.write(f'{var_name} = {value}')
         return res.success(value)
     
     
@@ -1146,14 +2183,11 @@ class Interpreter:
 
     def visit_AssignNode(self, node, context):
         res = RTResult()
-        var_name = node.op_tok
-        var_name1 = str(var_name)
-        var_name2 = var_name1[1:-1]
         value = res.register(self.visit(node.op_tok3, context))
         
         if res.error: return res
         
-        context.symbol_table.set(var_name2, value)
+        context.slots[node.op_tok.slot] = value
         #global_symbol_table.set(var_name, value)
         #print(var_name, context.symbol_table.get(var_name))
         #print(context.symbol_table.get(var_name))
@@ -1169,103 +2203,2155 @@ class Interpreter:
     def visit_ReadNode(self, node, context):
         
         res = RTResult()
-        var_name = node.op_tok3
-        var_name1 = str(var_name)
-        
-        new = var_name1.split(", ")
-        for x in range(0, len(new), 2):
-            var_name1 = new[x]
-            var_name2 = var_name1[1:-1]
-            value = input(f"Enter a value for {var_name2}: ")
+        
+        for var_name, slot in zip(node.var_names, node.slots):
+            value = context.input(f"Enter a value for {var_name}: ")
             value = int(value)
-            value = Number(value)
+            value = context.number(value)
             if res.error: return res
         
-            context.symbol_table.set(var_name2, value)
+            context.slots[slot] = value
         
         return res.success('')
         
-    def visit_BinOpNode(self, node, context):
-        res = RTResult()
-        left = res.register(self.visit(node.left_node, context))
-        if res.error: return res
-        right = res.register(self.visit(node.right_node, context))
-        if res.error: return res
-
-        if node.op_tok.type == TT_PLUS:
-            result, error = left.added_to(right)
-        elif node.op_tok.type == TT_MINUS:
-            result, error = left.subbed_by(right)
-        elif node.op_tok.type == TT_MUL:
-            result, error = left.multed_by(right)
-        elif node.op_tok.type == TT_DIV:
-            result, error = left.dived_by(right)
+#An expression is worked out on plain python numbers, and only its result is made into a Number, with the
+#position and context the Number would have had if every step had made one. A step keeps the context of its
+#left Number, so the context of the result is the one of the Number on the far left.
 
-        if error:
-            return res.failure(error)
-        else:
-            return res.success(result.set_pos(node.pos_start, node.pos_end))
+    def visit_BinOpNode(self, node, context):
+        return self.make_number(node, context, self.evaluate_BinOpNode)
 
     def visit_UnaryOpNode(self, node, context):
+        if node.op_tok.type == TT_MINUS:
+            return self.make_number(node, context, self.evaluate_UnaryOpNode)
+
+        #A unary + gives back the same Number with a new position, which moves the Number kept in a variable.
         res = RTResult()
         number = res.register(self.visit(node.node, context))
         if res.error: return res
+        return res.success(number.set_pos(node.pos_start, node.pos_end))
 
-        error = None
+    def visit_TempStoreNode(self, node, context):
+        return self.make_number(node, context, self.evaluate_TempStoreNode)
+
+    def visit_TempNode(self, node, context):
+        return self.make_number(node, context, self.evaluate_TempNode)
+
+    def make_number(self, node, context, evaluate):
+        try:
+            value = evaluate(node, context)
+        except RTFailure as failure:
+            return RTResult().failure(failure.error)
+
+        number = context.number(value).set_context(number_context(node, context))
+        return RTResult().success(number.set_pos(node.pos_start, node.pos_end))
+
+    ###################################
+
+#These functions give the plain value of a node, and raise RTFailure for a runtime error. A node without one
+#is visited and the value is taken out of its Number.
+
+    def evaluate(self, node, context):
+        method = getattr(self, f'evaluate_{type(node).__name__}', None)
+        if method is None:
+            res = self.visit(node, context)
+            if res.error: raise RTFailure(res.error)
+            return res.value.value
+        return method(node, context)
+
+    def evaluate_NumberNode(self, node, context):
+        return node.tok.value
+
+    def evaluate_ConstNode(self, node, context):
+        for line in node.traces:
+            context.output.write(line)
+        return node.value
+
+    def evaluate_VarNode(self, node, context):
+        value = context.slots[node.slot]
+        if not value:
+            raise RTFailure(RTError(
+                node.pos_start, node.pos_end,
+                f"'{node.var_name_tok.value}' is not defined",
+                context
+            ))
+
+        context.output.write(f'{node.var_name_tok.value} = {value}')
+        return value.value
+
+    def evaluate_BinOpNode(self, node, context):
+        left = self.evaluate(node.left_node, context)
+        right = self.evaluate(node.right_node, context)
+
+        op_type = node.op_tok.type
+        if op_type == TT_PLUS: return left + right
+        if op_type == TT_MINUS: return left - right
+        if op_type == TT_MUL: return left * right
+
+        if right == 0:
+            pos_start, pos_end = number_pos(node.right_node, context)
+            raise RTFailure(RTError(pos_start, pos_end, 'Division by zero', number_context(node.left_node, context)))
+        return left / right
+
+    def evaluate_UnaryOpNode(self, node, context):
+        if node.op_tok.type == TT_MINUS: return self.evaluate(node.node, context) * -1
+        if not unary_moves_number(node): return self.evaluate(node.node, context)
+
+        res = self.visit_UnaryOpNode(node, context)
+        if res.error: raise RTFailure(res.error)
+        return res.value.value
+
+    def evaluate_TempStoreNode(self, node, context):
+        value = context.slots[node.slot] = self.evaluate(node.expr, context)
+        return value
+
+    def evaluate_TempNode(self, node, context):
+        write = context.output.write
+        slots = context.slots
+        for text, slot in node.traces:
+            write(text if slot is None else f'{text} = {slots[slot]}')
+        return slots[node.slot]
+
+#These functions find the context and position of the Number a node would have given, without making it. Only a
+#variable has a Number that was made before, and its context and position are the ones kept on it.
+
+def number_context(node, context):
+    while True:
+        if isinstance(node, BinOpNode): node = node.left_node
+        elif isinstance(node, UnaryOpNode): node = node.node
+        elif isinstance(node, (TempStoreNode, TempNode)): node = node.expr
+        elif isinstance(node, VarNode): return context.slots[node.slot].context
+        else: return context
+
+def number_pos(node, context):
+    if isinstance(node, VarNode):
+        number = context.slots[node.slot]
+        return number.pos_start, number.pos_end
+    return node.pos_start, node.pos_end
+
+#A unary + only moves a Number that is kept somewhere, which is when there is a variable under it.
+def unary_moves_number(node):
+    while isinstance(node, UnaryOpNode) and node.op_tok.type != TT_MINUS:
+        node = node.node
+    return isinstance(node, VarNode)
+
+
+#######################################
+# PROFILER
+#######################################
+
+#The profiler shows where a program spends its time. The ProfilingInterpreter is an Interpreter that times every
+#visit and gives it to a Profiler, and it is only used when a Profiler is given to run(), so a run without one
+#is not slowed down at all. A profiled run always walks the parse tree, whatever the engine of the Program is,
+#because the other engines do not have a visit to time.
+#
+#Every visit is counted for the type of its node and for the line its node starts on. The cumulative time of a
+#visit has the time of the nodes under it, and the self time does not. A node type under another node of the
+#same type, like a BinOpNode in a BinOpNode, only adds its cumulative time once. The hits and cumulative time of
+#a line come from the statements that start on it, and its self time from every node that starts on it.
+#The self time of every path of nodes from the ProgramNode down is kept too, for flame graphs.
+#
+#One Profiler can be given to many runs of the same program, and it adds them all up.
+
+class Profiler:
+    def __init__(self):
+        self.types = {}
+        self.lines = {}
+        self.sources = {}
+        self.stacks = {}
+        self.total = 0.0
+        self.runs = 0
+
+    def add(self, name, line, path, cumulative, self_time, outer, statement):
+        stats = self.types.get(name)
+        if stats is None: stats = self.types[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        if outer: stats[1] += cumulative
+        stats[2] += self_time
+
+        stats = self.lines.get(line)
+        if stats is None: stats = self.lines[line] = [0, 0.0, 0.0]
+        if statement:
+            stats[0] += 1
+            stats[1] += cumulative
+        stats[2] += self_time
+
+        self.stacks[path] = self.stacks.get(path, 0.0) + self_time
+
+    #The text of a line is kept the first time a statement on it is run, so the report can show it.
+    def keep_source(self, line, pos):
+        if line not in self.sources:
+            source = pos.source
+            start = source.line_start(pos.anchor)
+            self.sources[line] = source.text[start:source.next_newline(start)].strip()
+
+    def as_dict(self):
+        return {
+            'runs': self.runs,
+            'seconds': self.total,
+            'lines': [
+                {'line': line, 'hits': hits, 'cumulative': cumulative, 'self': self_time,
+                 'source': self.sources.get(line, '')}
+                for line, (hits, cumulative, self_time) in sorted(self.lines.items(), key=lambda item: -item[1][1])
+            ],
+            'types': [
+                {'type': name, 'hits': hits, 'cumulative': cumulative, 'self': self_time}
+                for name, (hits, cumulative, self_time) in sorted(self.types.items(), key=lambda item: -item[1][2])
+            ],
+        }
+
+    #The statements are sorted by their cumulative time, and the node types by their self time.
+    def report(self, limit=20):
+        data = self.as_dict()
+        lines = [f"DustyDevil profile: {data['runs']} runs, {data['seconds'] * 1000:.3f} ms", '',
+                 'Statements by cumulative time',
+                 f"{'line':>6} {'hits':>8} {'cumulative':>13} {'self':>13}  source"]
+        for stats in data['lines'][:limit]:
+            if not stats['hits']: continue
+            lines.append(f"{stats['line']:>6} {stats['hits']:>8} {stats['cumulative'] * 1000:>10.3f} ms "
+                         f"{stats['self'] * 1000:>10.3f} ms  {stats['source']}")
+
+        lines += ['', 'Node types by self time', f"{'type':<14} {'hits':>8} {'cumulative':>13} {'self':>13}"]
+        for stats in data['types'][:limit]:
+            lines.append(f"{stats['type']:<14} {stats['hits']:>8} {stats['cumulative'] * 1000:>10.3f} ms "
+                         f"{stats['self'] * 1000:>10.3f} ms")
+        return '\n'.join(lines)
+
+    #Every path is written as its nodes joined by semicolons, with the self time in microseconds, which is the
+    #folded format that flamegraph.pl and speedscope read.
+    def folded(self):
+        lines = []
+        for path, self_time in sorted(self.stacks.items()):
+            micros = round(self_time * 1000000)
+            if micros: lines.append(';'.join(f'{name}:{line}' for name, line in path) + f' {micros}')
+        return '\n'.join(lines)
+
+class ProfilingInterpreter(Interpreter):
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.path = ()
+        self.children = []
+        self.running = set()
+
+    #Every node of an expression is visited on its own, so it is timed on its own too.
+    def evaluate(self, node, context):
+        res = self.visit(node, context)
+        if res.error: raise RTFailure(res.error)
+        return res.value.value
+
+    def visit(self, node, context):
+        profiler = self.profiler
+        name = type(node).__name__
+        pos = node.pos_start
+        line = pos.ln + 1
+        statement = isinstance(node, StmtNode)
+        if statement: profiler.keep_source(line, pos)
+
+        parent = self.path
+        path = self.path = parent + ((name, line),)
+        outer = name not in self.running
+        if outer: self.running.add(name)
+        self.children.append(0.0)
+
+        start = perf_counter()
+        try:
+            return Interpreter.visit(self, node, context)
+        finally:
+            cumulative = perf_counter() - start
+            children = self.children
+            self_time = cumulative - children.pop()
+            if children:
+                children[-1] += cumulative
+            else:
+                profiler.total += cumulative
+                profiler.runs += 1
+            self.path = parent
+            if outer: self.running.discard(name)
+            profiler.add(name, line, path, cumulative, self_time, outer, statement)
+
+
+#######################################
+# COMPILER
+#######################################
+
+#The compiler walks the parse tree only once and turns every node into a python closure. Each closure already
+#has its children and its operation bound to it, so running the program does not need to build method names,
+#call getattr, or create an RTResult for every node. It gives the same values, output, and errors as the
+#Interpreter above.
+
+#Closures report runtime errors by raising this exception. It is caught once by CompiledProgram.run and
+#turned back into an RTResult failure.
+
+class RTFailure(Exception):
+    def __init__(self, error):
+        super().__init__(error.details)
+        self.error = error
+
+class Compiler:
+    def compile(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    ###################################
+
+    def compile_ProgramNode(self, node):
+        return self.compile(node.op_tok4)
+
+    def compile_StmtsNode(self, node):
+        return self.compile(node.tok)
+
+    def compile_StmtNode(self, node):
+        return self.compile(node.tok)
+
+    def compile_VarlNode(self, node):
+        return self.compile(node.tok)
+
+    def compile_BlockNode(self, node):
+        codes = [self.compile(stmt) for stmt in node.stmts]
+
+        def block(context):
+            return ValueList([code(context) for code in codes])
+        return block
+
+    def compile_VarlOpNode(self, node):
+        left_code = self.compile(node.left_node)
+        right_code = self.compile(node.right_node)
+
+        def varl(context):
+            left = left_code(context)
+            return VarlOpNode(left, '', right_code(context))
+        return varl
+
+    def compile_NumberNode(self, node):
+        value = node.tok.value
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def number(context):
+            return context.number(value).set_context(context).set_pos(pos_start, pos_end)
+        return number
+
+    def compile_ConstNode(self, node):
+        value = node.value
+        traces = node.traces
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        if not traces:
+            def const(context):
+                return context.number(value).set_context(context).set_pos(pos_start, pos_end)
+            return const
+
+        def traced_const(context):
+            write = context.output.write
+            for line in traces:
+                write(line)
+            return context.number(value).set_context(context).set_pos(pos_start, pos_end)
+        return traced_const
+
+    def compile_VarNode(self, node):
+        var_name = node.var_name_tok.value
+        slot = node.slot
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def var(context):
+            value = context.slots[slot]
+            if not value:
+                raise RTFailure(RTError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+
+            context.output.write(f'{var_name} = {value}')
+            return value
+        return var
+
+    def compile_AssignNode(self, node):
+        slot = node.op_tok.slot
+        expr_code = self.compile(node.op_tok3)
+
+        def assign(context):
+            value = expr_code(context)
+            context.slots[slot] = value
+            return value
+        return assign
+
+    def compile_WriteNode(self, node):
+        return self.compile(node.op_tok3)
+
+    def compile_ReadNode(self, node):
+        targets = list(zip(node.var_names, node.slots))
+
+        def read(context):
+            slots = context.slots
+            for var_name, slot in targets:
+                value = context.input(f"Enter a value for {var_name}: ")
+                slots[slot] = context.number(int(value))
+            return ''
+        return read
+
+#An expression is compiled to closures that give plain python numbers, like Interpreter.evaluate() does, and only
+#the closure of the whole expression makes a Number.
+
+    def compile_BinOpNode(self, node):
+        return self.compile_number(node)
+
+    def compile_UnaryOpNode(self, node):
+        if node.op_tok.type == TT_MINUS: return self.compile_number(node)
+
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+        code = self.compile(node.node)
+
+        def unary_op(context):
+            return code(context).set_pos(pos_start, pos_end)
+        return unary_op
+
+    def compile_TempStoreNode(self, node):
+        return self.compile_number(node)
+
+    def compile_TempNode(self, node):
+        return self.compile_number(node)
+
+    def compile_number(self, node):
+        code = self.compile_value(node)
+        context_code = self.compile_context(node)
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def number(context):
+            return context.number(code(context)).set_context(context_code(context)).set_pos(pos_start, pos_end)
+        return number
+
+    ###################################
+
+#These functions compile a node to a closure that gives its plain value. A node without one is compiled to its
+#Number closure and the value is taken out of it.
+
+    def compile_value(self, node):
+        method = getattr(self, f'value_{type(node).__name__}', None)
+        if method is None:
+            code = self.compile(node)
+
+            def value(context):
+                return code(context).value
+            return value
+        return method(node)
+
+    def value_NumberNode(self, node):
+        value = node.tok.value
+
+        def number(context):
+            return value
+        return number
+
+    def value_ConstNode(self, node):
+        value = node.value
+        traces = node.traces
+
+        def const(context):
+            write = context.output.write
+            for line in traces:
+                write(line)
+            return value
+        return const
 
+    def value_VarNode(self, node):
+        var_name = node.var_name_tok.value
+        slot = node.slot
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def var(context):
+            value = context.slots[slot]
+            if not value:
+                raise RTFailure(RTError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+
+            context.output.write(f'{var_name} = {value}')
+            return value.value
+        return var
+
+#Every operator gets its own closure so the operator type is only checked once, while compiling.
+
+    def value_BinOpNode(self, node):
+        left_code = self.compile_value(node.left_node)
+        right_code = self.compile_value(node.right_node)
+        op_type = node.op_tok.type
+
+        if op_type == TT_PLUS:
+            def add(context):
+                return left_code(context) + right_code(context)
+            return add
+
+        if op_type == TT_MINUS:
+            def sub(context):
+                return left_code(context) - right_code(context)
+            return sub
+
+        if op_type == TT_MUL:
+            def mul(context):
+                return left_code(context) * right_code(context)
+            return mul
+
+        pos_code = self.compile_pos(node.right_node)
+        context_code = self.compile_context(node.left_node)
+
+        def div(context):
+            left = left_code(context)
+            right = right_code(context)
+            if right == 0:
+                pos_start, pos_end = pos_code(context)
+                raise RTFailure(RTError(pos_start, pos_end, 'Division by zero', context_code(context)))
+            return left / right
+        return div
+
+    def value_UnaryOpNode(self, node):
         if node.op_tok.type == TT_MINUS:
-            number, error = number.multed_by(Number(-1))
+            code = self.compile_value(node.node)
 
-        if error:
-            return res.failure(error)
+            def neg(context):
+                return code(context) * -1
+            return neg
+
+        #A unary + over a variable moves the Number kept in it, so that one keeps its Number closure.
+        if unary_moves_number(node):
+            code = self.compile_UnaryOpNode(node)
+
+            def pos(context):
+                return code(context).value
+            return pos
+        return self.compile_value(node.node)
+
+    def value_TempStoreNode(self, node):
+        code = self.compile_value(node.expr)
+        slot = node.slot
+
+        def temp_store(context):
+            value = context.slots[slot] = code(context)
+            return value
+        return temp_store
+
+    def value_TempNode(self, node):
+        traces = node.traces
+        slot = node.slot
+
+        def temp(context):
+            write = context.output.write
+            slots = context.slots
+            for text, trace_slot in traces:
+                write(text if trace_slot is None else f'{text} = {slots[trace_slot]}')
+            return slots[slot]
+        return temp
+
+#These functions compile the context and the position of the Number a node would have given, like
+#number_context() and number_pos() find them.
+
+    def compile_context(self, node):
+        while isinstance(node, (BinOpNode, UnaryOpNode, TempStoreNode, TempNode)):
+            if isinstance(node, BinOpNode): node = node.left_node
+            elif isinstance(node, UnaryOpNode): node = node.node
+            else: node = node.expr
+
+        if isinstance(node, VarNode):
+            slot = node.slot
+
+            def var_context(context):
+                return context.slots[slot].context
+            return var_context
+
+        def own_context(context):
+            return context
+        return own_context
+
+    def compile_pos(self, node):
+        if isinstance(node, VarNode):
+            slot = node.slot
+
+            def var_pos(context):
+                number = context.slots[slot]
+                return number.pos_start, number.pos_end
+            return var_pos
+
+        span = (node.pos_start, node.pos_end)
+
+        def own_pos(context):
+            return span
+        return own_pos
+
+#This class holds the closure made from the whole program. It can be run many times with different contexts.
+
+class CompiledProgram:
+    def __init__(self, node):
+        self.node = node
+        self.code = Compiler().compile(node)
+
+    def run(self, context):
+        res = RTResult()
+        try:
+            return res.success(self.code(context))
+        except RTFailure as failure:
+            return res.failure(failure.error)
+
+
+#######################################
+# BYTECODE
+#######################################
+
+#The bytecode compiler lowers the parse tree into one flat list of instructions that the virtual machine below
+#runs in a single loop, without any python recursion. Every instruction takes three slots in the list: the
+#opcode, its argument, and the index of its (pos_start, pos_end) span used for errors.
+
+OP_LOAD_CONST    = 0
+OP_LOAD_VAR      = 1
+OP_STORE_VAR     = 2
+OP_BINARY_ADD    = 3
+OP_BINARY_SUB    = 4
+OP_BINARY_MUL    = 5
+OP_BINARY_DIV    = 6
+OP_UNARY_NEG     = 7
+OP_UNARY_POS     = 8
+OP_READ          = 9
+OP_LOAD_EMPTY    = 10
+OP_WRITE         = 11
+OP_BUILD_BLOCK   = 12
+OP_RETURN        = 13
+OP_TRACE         = 14
+OP_STORE_TEMP    = 15
+OP_LOAD_TEMP     = 16
+OP_TRACE_VAR     = 17
+
+OPNAMES = [
+    'LOAD_CONST', 'LOAD_VAR', 'STORE_VAR', 'BINARY_ADD', 'BINARY_SUB', 'BINARY_MUL', 'BINARY_DIV',
+    'UNARY_NEG', 'UNARY_POS', 'READ', 'LOAD_EMPTY', 'WRITE', 'BUILD_BLOCK', 'RETURN', 'TRACE',
+    'STORE_TEMP', 'LOAD_TEMP', 'TRACE_VAR',
+]
+
+INSTRUCTION_SIZE = 3
+
+#This class holds the compiled instructions together with the tables their arguments point into. The names are
+#the slot names from the Resolver, so the argument of a variable instruction is its slot.
+
+class Bytecode:
+    def __init__(self):
+        self.code = []
+        self.consts = []
+        self.names = []
+        self.spans = []
+
+    def emit(self, op, arg=0, span=0):
+        self.code.extend((op, arg, span))
+
+    def add_const(self, value):
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def add_span(self, pos_start, pos_end):
+        self.spans.append((pos_start, pos_end))
+        return len(self.spans) - 1
+
+class BytecodeCompiler:
+    def compile(self, node):
+        self.bytecode = Bytecode()
+        self.bytecode.names = list(node.slot_names)
+        self.emit_node(node)
+        self.bytecode.emit(OP_RETURN)
+        return self.bytecode
+
+    #This function compiles one statement on its own. The names are shared with the caller, so slots the caller
+    #adds later are named too.
+    def compile_statement(self, node, names):
+        self.bytecode = Bytecode()
+        self.bytecode.names = names
+        self.emit_node(node)
+        self.bytecode.emit(OP_RETURN)
+        return self.bytecode
+
+    def emit_node(self, node):
+        method_name = f'emit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_emit_method)
+        return method(node)
+
+    def no_emit_method(self, node):
+        raise Exception(f'No emit_{type(node).__name__} method defined')
+
+    ###################################
+
+    def emit_ProgramNode(self, node):
+        self.emit_node(node.op_tok4)
+
+    def emit_StmtsNode(self, node):
+        self.emit_node(node.tok)
+
+    def emit_StmtNode(self, node):
+        self.emit_node(node.tok)
+
+    def emit_VarlNode(self, node):
+        self.emit_node(node.tok)
+
+#Every statement leaves its value on the stack and BUILD_BLOCK collects them, like visit_BlockNode does.
+
+    def emit_BlockNode(self, node):
+        for stmt in node.stmts:
+            self.emit_node(stmt)
+        self.bytecode.emit(OP_BUILD_BLOCK, len(node.stmts))
+
+    def emit_NumberNode(self, node):
+        bc = self.bytecode
+        bc.emit(OP_LOAD_CONST, bc.add_const(node.tok.value), bc.add_span(node.pos_start, node.pos_end))
+
+    def emit_ConstNode(self, node):
+        bc = self.bytecode
+        for line in node.traces:
+            bc.emit(OP_TRACE, bc.add_const(line))
+        bc.emit(OP_LOAD_CONST, bc.add_const(node.value), bc.add_span(node.pos_start, node.pos_end))
+
+    def emit_VarNode(self, node):
+        bc = self.bytecode
+        bc.emit(OP_LOAD_VAR, node.slot, bc.add_span(node.pos_start, node.pos_end))
+
+    def emit_AssignNode(self, node):
+        bc = self.bytecode
+        self.emit_node(node.op_tok3)
+        bc.emit(OP_STORE_VAR, node.op_tok.slot)
+
+#Write pushes every expression in its list and WRITE joins them into the value visit_VarlOpNode would give.
+
+    def emit_WriteNode(self, node):
+        items = varl_items(node.op_tok3)
+        for item in items:
+            self.emit_node(item)
+        self.bytecode.emit(OP_WRITE, len(items))
+
+    def emit_ReadNode(self, node):
+        bc = self.bytecode
+        for slot in node.slots:
+            bc.emit(OP_READ, slot)
+        bc.emit(OP_LOAD_EMPTY)
+
+    def emit_BinOpNode(self, node):
+        bc = self.bytecode
+        self.emit_node(node.left_node)
+        self.emit_node(node.right_node)
+
+        op_type = node.op_tok.type
+        if op_type == TT_PLUS: op = OP_BINARY_ADD
+        elif op_type == TT_MINUS: op = OP_BINARY_SUB
+        elif op_type == TT_MUL: op = OP_BINARY_MUL
+        elif op_type == TT_DIV: op = OP_BINARY_DIV
+        bc.emit(op, 0, bc.add_span(node.pos_start, node.pos_end))
+
+    def emit_UnaryOpNode(self, node):
+        bc = self.bytecode
+        self.emit_node(node.node)
+        op = OP_UNARY_NEG if node.op_tok.type == TT_MINUS else OP_UNARY_POS
+        bc.emit(op, 0, bc.add_span(node.pos_start, node.pos_end))
+
+#A hidden slot keeps the Number of the first expression, and LOAD_TEMP makes a new one from it, so the position of
+#the kept Number is never moved.
+
+    def emit_TempStoreNode(self, node):
+        self.emit_node(node.expr)
+        self.bytecode.emit(OP_STORE_TEMP, node.slot)
+
+    def emit_TempNode(self, node):
+        bc = self.bytecode
+        for text, slot in node.traces:
+            if slot is None: bc.emit(OP_TRACE, bc.add_const(text))
+            else: bc.emit(OP_TRACE_VAR, slot)
+        bc.emit(OP_LOAD_TEMP, node.slot, bc.add_span(node.pos_start, node.pos_end))
+
+#The disassembler prints one instruction per line with its offset, name, argument, and what the argument means.
+
+def disassemble(bytecode):
+    lines = []
+    code = bytecode.code
+    for offset in range(0, len(code), INSTRUCTION_SIZE):
+        op, arg, span = code[offset:offset + INSTRUCTION_SIZE]
+
+        if op in (OP_LOAD_CONST, OP_TRACE): detail = f'{arg} ({bytecode.consts[arg]})'
+        elif op in (OP_LOAD_VAR, OP_STORE_VAR, OP_READ, OP_TRACE_VAR): detail = f'{arg} ({bytecode.names[arg]})'
+        elif op in (OP_WRITE, OP_BUILD_BLOCK, OP_STORE_TEMP, OP_LOAD_TEMP): detail = f'{arg}'
+        else: detail = ''
+
+        if op in (OP_LOAD_CONST, OP_LOAD_VAR, OP_BINARY_ADD, OP_BINARY_SUB, OP_BINARY_MUL, OP_BINARY_DIV,
+                  OP_UNARY_NEG, OP_UNARY_POS, OP_LOAD_TEMP):
+            pos_start = bytecode.spans[span][0]
+            line = f'{pos_start.ln + 1:>5}'
         else:
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+            line = ' ' * 5
+
+        lines.append(f'{line} {offset // INSTRUCTION_SIZE:>6} {OPNAMES[op]:<12} {detail}'.rstrip())
+    return '\n'.join(lines)
+
+
+#######################################
+# VIRTUAL MACHINE
+#######################################
 
+#The virtual machine runs the bytecode with a value stack. The most common instructions are checked first.
+#The loop is a generator, so it can stop in the middle of a program: it yields the prompt when a Read needs a
+#value and is sent the value back, and it yields None after every Write so the output can be handed on. run()
+#answers the prompts with context.input right away, and run_async() awaits the answers instead.
+
+class VirtualMachine:
+    def run(self, bytecode, context):
+        read = context.input
+        steps = self.steps(bytecode, context)
+        try:
+            prompt = next(steps)
+            while True:
+                prompt = steps.send(None if prompt is None else read(prompt))
+        except StopIteration as stop:
+            return stop.value
+
+    def steps(self, bytecode, context):
+        res = RTResult()
+        code = bytecode.code
+        consts = bytecode.consts
+        names = bytecode.names
+        spans = bytecode.spans
+        slots = context.slots
+        write = context.output.write
+        number_of = context.number
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        while True:
+            op = code[pc]
+            arg = code[pc + 1]
+            span = code[pc + 2]
+            pc += INSTRUCTION_SIZE
+
+            if op == OP_LOAD_VAR:
+                value = slots[arg]
+                if not value:
+                    var_name = names[arg]
+                    pos_start, pos_end = spans[span]
+                    return res.failure(RTError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+
+                write(f'{names[arg]} = {value}')
+                push(value)
+
+            elif op == OP_LOAD_CONST:
+                pos_start, pos_end = spans[span]
+                push(number_of(consts[arg]).set_context(context).set_pos(pos_start, pos_end))
+
+            #The operators work like the methods of Number, but make their Number with context.number.
+            elif OP_BINARY_ADD <= op <= OP_BINARY_DIV:
+                right = pop()
+                left = pop()
+                if op == OP_BINARY_ADD: value = left.value + right.value
+                elif op == OP_BINARY_SUB: value = left.value - right.value
+                elif op == OP_BINARY_MUL: value = left.value * right.value
+                elif right.value == 0:
+                    return res.failure(RTError(right.pos_start, right.pos_end, 'Division by zero', left.context))
+                else: value = left.value / right.value
+
+                pos_start, pos_end = spans[span]
+                push(number_of(value).set_context(left.context).set_pos(pos_start, pos_end))
+
+            elif op == OP_STORE_VAR:
+                slots[arg] = stack[-1]
+
+            elif op == OP_BUILD_BLOCK:
+                values = stack[-arg:]
+                del stack[-arg:]
+                push(ValueList(values))
+
+            elif op == OP_WRITE:
+                items = stack[-arg:]
+                del stack[-arg:]
+                value = items[0]
+                for item in items[1:]:
+                    value = VarlOpNode(value, '', item)
+                push(value)
+                yield None
+
+            elif op == OP_UNARY_NEG or op == OP_UNARY_POS:
+                number = pop()
+                if op == OP_UNARY_NEG:
+                    number = number_of(number.value * -1).set_context(number.context)
+                pos_start, pos_end = spans[span]
+                push(number.set_pos(pos_start, pos_end))
+
+            elif op == OP_READ:
+                value = yield f"Enter a value for {names[arg]}: "
+                slots[arg] = number_of(int(value))
+
+            elif op == OP_LOAD_EMPTY:
+                push('')
+
+            elif op == OP_TRACE:
+                write(consts[arg])
+
+            elif op == OP_TRACE_VAR:
+                write(f'{names[arg]} = {slots[arg]}')
+
+            elif op == OP_STORE_TEMP:
+                slots[arg] = stack[-1]
+
+            elif op == OP_LOAD_TEMP:
+                number = slots[arg]
+                pos_start, pos_end = spans[span]
+                push(number_of(number.value).set_context(number.context).set_pos(pos_start, pos_end))
+
+            elif op == OP_RETURN:
+                return res.success(pop())
 
 
+#######################################
+# CACHE
+#######################################
+
+#The program cache keeps the parse tree of every program it is given in a file, so running the same program
+#again skips the lexer and the parser, like .pyc files do for Python. A file is found by a hash of the file name
+#and text of the program and of the interpreter itself, so a changed program or a changed interpreter never
+#loads an old tree. Only programs that parse without errors are kept.
+#
+#The tree is kept as nested tuples written with marshal. A node is its class name followed by the arguments it
+#was made with, and a token is 0 followed by its type, value, and offset. Loading makes the nodes again with
+#those arguments, so the positions come out the same as from the parser. Only the node classes below can be
+#made, so a cache file cannot run any other code.
+#
+#A file that cannot be read, or does not belong to the program it is found by, is deleted and the program is
+#parsed again. Files are written to a temporary name first and then renamed, so a run that stops while writing
+#never leaves half a file behind.
+
+VERSION = '1.1'
+CACHE_MAGIC = b'DDC1'
+
+CACHE_NODES = {cls.__name__: cls for cls in (
+    ProgramNode, ProgramNameNode, ProgramStartNode, SemicolonNode, StmtsNode, StmtNode, WriteNode, ReadNode,
+    AssignNode, VarlNode, VarNode, IdentNode, ProgramEndNode, ReadOpNode, WriteOpNode, AssignOpNode, CommaNode,
+    NumberNode, LParenNode, RParenNode, BinOpNode, VarlOpNode, StmtsOpNode, BlockNode, UnaryOpNode,
+)}
+
+#The arguments of every node class, which are kept on the node with the same names.
+CACHE_FIELDS = {
+    name: cls.__init__.__code__.co_varnames[1:cls.__init__.__code__.co_argcount]
+    for name, cls in CACHE_NODES.items()
+}
+
+def encode_tree(node):
+    if isinstance(node, Token):
+        return (0, node.type, node.value, node.idx)
+    if isinstance(node, list):
+        return [encode_tree(item) for item in node]
+
+    name = type(node).__name__
+    if name in CACHE_NODES:
+        return (name,) + tuple(encode_tree(getattr(node, field)) for field in CACHE_FIELDS[name])
+    return node
+
+def decode_tree(data, source):
+    if isinstance(data, tuple):
+        if data[0] == 0:
+            tok = Token(data[1], data[2])
+            tok.idx = data[3]
+            tok.source = source
+            return tok
+        return CACHE_NODES[data[0]](*[decode_tree(item, source) for item in data[1:]])
+    if isinstance(data, list):
+        return [decode_tree(item, source) for item in data]
+    return data
+
+#Making or walking a large tree makes the garbage collector run over and over, and a tree has no cycles for it
+#to find, so it is paused while the tree is read or written.
+def without_gc(func, *args):
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return func(*args)
+    finally:
+        if enabled: gc.enable()
+
+def interpreter_tag():
+    with open(__file__, 'rb') as file:
+        digest = hashlib.sha256(file.read()).hexdigest()[:16]
+    return f'{VERSION}-{sys.implementation.cache_tag}-{digest}'.encode()
+
+class ProgramCache:
+    tag = None
+
+    def __init__(self, directory):
+        self.directory = directory
+        if ProgramCache.tag is None: ProgramCache.tag = interpreter_tag()
+        self.header = CACHE_MAGIC + ProgramCache.tag + b'\n'
+
+    def key(self, fn, text):
+        return hashlib.sha256(self.header + fn.encode() + b'\0' + text.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.ddc')
+
+    #This function returns the parse tree kept for the program, or None when there is no good one.
+    def load(self, fn, text):
+        key = self.key(fn, text)
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        try:
+            if not data.startswith(self.header): raise ValueError('wrong header')
+            stored_key, tree = without_gc(marshal.loads, data[len(self.header):])
+            if stored_key != key: raise ValueError('wrong program')
+            node = without_gc(decode_tree, tree, Source(fn, text))
+            if not isinstance(node, ProgramNode): raise ValueError('not a program')
+        except Exception:
+            self.remove(path)
+            return None
+        return node
+
+    def store(self, fn, text, node):
+        key = self.key(fn, text)
+        try:
+            data = self.header + marshal.dumps((key, without_gc(encode_tree, node)))
+        except (RecursionError, ValueError):
+            #Expressions nested too deep to write are parsed every time instead.
+            return
+
+        temp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            #A cache that cannot be written to only makes the next run parse again.
+            self.remove(temp_path)
+
+    def remove(self, path):
+        if path is None: return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+#######################################
+# STATS
+#######################################
+
+#A Stats object can be given to run(), Program, and Program.execute() to find out where a run spends its time.
+#Every phase gets its wall time and the CPU time of the process: lex, parse, and store for a new program, or load
+#when it comes from the cache, then optimize, resolve, compile, and execute. When the text is lexed for the
+#Stats, all of its tokens are made before the parser starts, so the two phases can be timed apart.
+#
+#The counts are the tokens, the nodes of the parse tree, the Numbers made while the program ran, and the
+#variables it read and wrote. The counts only cost a little, so Stats can be left on.
+#The peak memory of every phase is only found when memory is on, because tracemalloc makes everything it
+#watches a few times slower.
+#
+#The Numbers and writes are counted as the program makes and stores them, on the Execution of the run, so programs
+#that run on other threads at the same time do not add theirs. One Stats object given to many runs adds them all up.
+
+class Stats:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}
+        self.tokens = 0
+        self.nodes = 0
+        self.numbers = 0
+        self.reads = 0
+        self.writes = 0
+
+    def timed(self, phase, func, *args):
+        tracing = self.memory and not tracemalloc.is_tracing()
+        if tracing: tracemalloc.start()
+        if self.memory:
+            tracemalloc.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+
+        wall = perf_counter()
+        cpu = process_time()
+        try:
+            return func(*args)
+        finally:
+            times = self.phases.setdefault(phase, {'wall': 0.0, 'cpu': 0.0, 'memory_peak': None})
+            times['wall'] += perf_counter() - wall
+            times['cpu'] += process_time() - cpu
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1] - memory
+                times['memory_peak'] = max(times['memory_peak'] or 0, peak)
+                if tracing: tracemalloc.stop()
+
+    def as_dict(self):
+        return {
+            'phases': self.phases,
+            'wall': sum(times['wall'] for times in self.phases.values()),
+            'cpu': sum(times['cpu'] for times in self.phases.values()),
+            'memory_peak': max((times['memory_peak'] or 0 for times in self.phases.values()), default=0)
+                           if self.memory else None,
+            'tokens': self.tokens,
+            'nodes': self.nodes,
+            'numbers': self.numbers,
+            'reads': self.reads,
+            'writes': self.writes,
+        }
+
+    def as_json(self, indent=2):
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def report(self):
+        data = self.as_dict()
+        lines = [f"{'phase':<10} {'wall':>12} {'cpu':>12}" + (f" {'memory':>12}" if self.memory else '')]
+        for phase, times in list(data['phases'].items()) + [('total', data)]:
+            line = f"{phase:<10} {times['wall'] * 1000:>9.3f} ms {times['cpu'] * 1000:>9.3f} ms"
+            if self.memory: line += f" {times['memory_peak'] / 1024:>8.1f} KiB"
+            lines.append(line)
+        lines.append(f"{data['tokens']} tokens, {data['nodes']} nodes, {data['numbers']} Numbers, "
+                     f"{data['reads']} variable reads, {data['writes']} variable writes")
+        return '\n'.join(lines)
+
+def timed(stats, phase, func, *args):
+    if stats is None: return func(*args)
+    return stats.timed(phase, func, *args)
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for value in vars(node).values():
+            if isinstance(value, list):
+                stack.extend(item for item in value if hasattr(item, '__dict__'))
+            elif hasattr(value, '__dict__'):
+                stack.append(value)
+    return count
+
+#The variables of a run with Stats are kept in CountingSlots, which counts every value stored in a variable as
+#the engines store it. The slots after the variables are the hidden temporaries, and storing those is not counted.
+class CountingSlots(list):
+    def __init__(self, values, variables):
+        super().__init__(values)
+        self.variables = variables
+        self.writes = 0
+
+    def __setitem__(self, index, value):
+        if index < self.variables: self.writes += 1
+        list.__setitem__(self, index, value)
 
 #######################################
 # RUN
 #######################################
 
 
-global_symbol_table = SymbolTable()
-global_symbol_table.set("null", Number(0))
+#Every run gets a symbol table of its own, so two programs never see each other's variables, even when they run
+#at the same time on different threads. A table can be passed to run() again to keep the variables of one run
+#for the next one, like the lines of a shell.
+
+def make_symbol_table():
+    symbol_table = SymbolTable()
+    symbol_table.set("null", Number(0))
+    return symbol_table
+
+#This function only lexes and parses the text. It returns the parse tree, or the first error found.
+#parse_file() does the same for a program file, which the MappedLexicalAnalyzer lexes from the mapped bytes
+#without reading it into a str, so both give the same tree and the same errors.
+
+def parse_program(fn, text, stats=None):
+    return parse_tokens(RegexLexicalAnalyzer(fn, text), stats)
+
+def parse_file(fn, stats=None):
+    with MappedLexicalAnalyzer(fn) as lexer:
+        return parse_tokens(lexer, stats)
+
+#The parser can stop before the end of the text, so the rest of the tokens are read to find any illegal
+#character, which is reported before syntax errors. That is done too when the parser raises on a syntax error it
+#does not report, and the exception only goes on when there is no illegal character, like it did when the text
+#was lexed before it was parsed. With Stats, the text is lexed to a list first.
+
+def parse_tokens(lexer, stats=None):
+    if stats is not None:
+        tokens, error = stats.timed('lex', lexer.make_tokens)
+        if error: return None, error
+        stats.tokens += len(tokens)
+        ast = stats.timed('parse', Parser(tokens).parse)
+        return ast.node, ast.error
+
+    try:
+        parser = Parser(lexer.iter_tokens())
+        try:
+            ast = parser.parse()
+        except LexFailure:
+            raise
+        except Exception:
+            for tok in parser.tokens: pass
+            raise
+        for tok in parser.tokens: pass
+    except LexFailure as failure:
+        return None, failure.error
+
+    return ast.node, ast.error
+
+#A Program is lexed, parsed, and compiled once, and can then be run as many times as needed with execute(), so a
+#worker that runs the same program over and over only pays for the parse once. An illegal character or a syntax
+#error is kept on the program and returned by every execute(), with the same output run() gives for it.
+#The engine chooses how the parse tree is executed: 'tree' visits the nodes with the Interpreter,
+#'closure' compiles them once with the Compiler before running, and 'vm' compiles them to bytecode
+#for the VirtualMachine. When optimize is on, the parse tree goes through the ConstantFolder first, and
+#through the SubexpressionEliminator after the Resolver, which is kept as eliminator to tell what it removed.
+#When a cache folder is given, the parse tree is kept there with the ProgramCache and loaded on the next run.
+#A tree that was already parsed, like the one from IncrementalParser.tree(), can be given as parsed instead.
+#The phases are timed with the Stats when they are given.
+
+ENGINES = ('tree', 'closure', 'vm')
+
+class Program:
+    def __init__(self, fn, text, engine='tree', optimize=False, cache_dir=None, parsed=None, stats=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+
+        self.fn = fn
+        self.engine = engine
+        self.code = None
+        self.async_code = None
+        self.eliminator = None
+
+        cache = ProgramCache(cache_dir) if cache_dir and parsed is None else None
+        node = timed(stats, 'load', cache.load, fn, text) if cache else None
+        error = None
+        if parsed is not None:
+            node, error = parsed
+        elif node is None:
+            node, error = parse_program(fn, text, stats)
+            if cache and not error: timed(stats, 'store', cache.store, fn, text, node)
+
+        self.node = node
+        self.error = error
+        if error: return
+        if stats is not None: stats.nodes += count_nodes(node)
+
+        if optimize:
+            node = timed(stats, 'optimize', ConstantFolder().fold, node)
+        timed(stats, 'resolve', Resolver().resolve, node)
+        if optimize:
+            self.eliminator = SubexpressionEliminator()
+            node = timed(stats, 'optimize', self.eliminator.eliminate, node)
+        self.node = node
+
+        if engine == 'closure':
+            self.code = timed(stats, 'compile', CompiledProgram, node)
+        elif engine == 'vm':
+            self.code = timed(stats, 'compile', BytecodeCompiler().compile, node)
+
+    #The bytecode for run_async(), which is made the first time it is needed when the engine is not 'vm'.
+    def bytecode(self):
+        if self.engine == 'vm': return self.code
+        if self.async_code is None: self.async_code = BytecodeCompiler().compile(self.node)
+        return self.async_code
+
+    #This function runs the program once with a new Execution. The arguments are the ones of Execution.
+
+    def execute(self, output=None, reader=None, symbol_table=None, profiler=None, stats=None):
+        return Execution(self, output, reader, symbol_table, profiler, stats).run()
+
+#An Execution is one run of a Program, and it owns everything that run changes: the variables, the sink it writes
+#to, and the reader it reads from. The Program is only read, so one Program can be executed by many threads at
+#the same time, each with its own Execution.
+#The output is the sink the program writes its lines to, and it is the screen when no sink is given.
+#The reader is called with the prompt for every value a Read needs, and it is input() when none is given.
+#The symbol table keeps the variables, and a new one is made when none is given.
+#When a Profiler is given, the run is timed with the ProfilingInterpreter. When Stats are given, the execute
+#phase is timed and the Numbers, reads, and writes of the run are counted. The Numbers are counted on the
+#Execution, with the context.number of its run, so a run without Stats makes them without counting.
+
+class Execution:
+    def __init__(self, program, output=None, reader=None, symbol_table=None, profiler=None, stats=None):
+        self.program = program
+        self.output = output if output is not None else StdoutSink()
+        if stats is not None: self.output = CountingSink(self.output)
+        self.stats = stats
+        self.input = reader or input
+        self.symbol_table = symbol_table if symbol_table is not None else make_symbol_table()
+        self.profiler = profiler
+        self.context = None
+        self.numbers = 0
+
+    #This function gets the run ready and makes its context. It returns the error that stops the program before
+    #it starts, which is an illegal character or a syntax error. The welcome line is written for every syntax error
+    #but the one for tokens after PROG_END;, which is found after the point the parser wrote it.
+
+    def start(self):
+        program = self.program
+        output = self.output
+        if isinstance(program.error, (IllegalCharError, TrailingInputError)): return program.error
+
+        output.write('Welcome to the DustyDevil Programming Language! \n')
+
+        #return ast.node, ast.error
+        #return tokens, error
+        
+        if program.error:
+            output.flush()
+            return program.error
+
+        node = program.node
+        context = self.context = Context('<program>')
+        context.symbol_table = self.symbol_table
+        context.slots = self.symbol_table.load(node.slot_names) + [None] * node.temp_count
+        context.output = output
+        context.input = self.input
+        if self.stats is not None:
+            context.number = self.count_number
+            context.slots = CountingSlots(context.slots, len(node.slot_names))
+
+    def count_number(self, value):
+        self.numbers += 1
+        return Number(value)
+
+    def finish(self, result):
+        context = self.context
+        context.symbol_table.store(self.program.node.slot_names, context.slots)
+        self.output.flush()
+        return result.value, result.error
+
+    def run(self):
+        error = self.start()
+        if error: return None, error
+
+        stats = self.stats
+        if stats is None: return self.finish(self.evaluate())
+
+        #The welcome line is the only line that is not a variable read.
+        result = stats.timed('execute', self.evaluate)
+        stats.numbers += self.numbers
+        stats.reads += self.output.lines - 1
+        stats.writes += self.context.slots.writes
+        return self.finish(result)
+
+    def evaluate(self):
+        # Run program
+        program = self.program
+        context = self.context
+        if self.profiler is not None:
+            return ProfilingInterpreter(self.profiler).visit(program.node, context)
+        elif program.engine == 'closure':
+            return program.code.run(context)
+        elif program.engine == 'vm':
+            return VirtualMachine().run(program.code, context)
+        else:
+            interpreter = Interpreter()
+            return interpreter.visit(program.node, context)
+
+    #This function runs the program on the VirtualMachine, whatever the engine of the Program is, because the
+    #loop of the virtual machine can stop at a Read and go on when the value comes. The reader is awaited for
+    #every value, and the output should be an AsyncSink, which is drained every time the program stops.
+
+    async def run_async(self):
+        output = self.output
+        error = self.start()
+        if error:
+            await output.drain()
+            return None, error
+
+        read = self.input
+        steps = VirtualMachine().steps(self.program.bytecode(), self.context)
+        try:
+            prompt = next(steps)
+            while True:
+                await output.drain()
+                prompt = steps.send(None if prompt is None else await read(prompt))
+        except StopIteration as stop:
+            result = stop.value
+
+        value = self.finish(result)
+        await output.drain()
+        return value
 
 #This is the run function that initializes the lexer and parser and returns the ast node or error.
+#It makes a Program from the text and executes it once. The arguments are the ones of Program and Execution.
 
-def run(fn, text):
-    lexer = LexicalAnalyzer(fn, text)
-    tokens, error = lexer.make_tokens()
-    if error: return None, error
-    
-    parser = Parser(tokens)
-    ast = parser.parse()
+def run(fn, text, engine='tree', output=None, optimize=False, reader=None, cache_dir=None, symbol_table=None,
+        profiler=None, stats=None):
+    program = Program(fn, text, engine, optimize, cache_dir, stats=stats)
+    return program.execute(output, reader, symbol_table, profiler, stats)
 
-    #return ast.node, ast.error
-    #return tokens, error
-    
-    if ast.error: return None, ast.error
+#This is the run function for a program file, which is lexed from the file with parse_file() instead of being read
+#into a str first. The other arguments are the ones of run(), without the cache, which needs the text.
+
+def run_file(fn, engine='tree', output=None, optimize=False, reader=None, symbol_table=None, profiler=None,
+             stats=None):
+    program = Program(fn, None, engine, optimize, parsed=parse_file(fn, stats), stats=stats)
+    return program.execute(output, reader, symbol_table, profiler, stats)
+
+#This is the run function for asyncio. The program is a Program, the reader is an async function that is
+#awaited with the prompt for every value a Read needs, and the writer is an async function that is awaited with
+#every line the program writes. Many programs can run on one event loop this way, because a program waiting
+#for a value lets the others run.
+
+async def run_async(program, reader, writer, symbol_table=None):
+    execution = Execution(program, AsyncSink(writer), reader, symbol_table)
+    return await execution.run_async()
+
+#######################################
+# RE-RUN
+#######################################
+
+#The dependency graph tells which statements of a resolved program need the values of which others. Every
+#statement defines some slots (the variable of an assignment, the variables of a Read, and the hidden slots of
+#its TempStoreNodes) and uses others (its variables, and the hidden slots of its TempNodes). The program has no
+#loops or branches, so the value a statement uses comes from the last statement before it that defined that slot.
+#inputs gives the first and the number of the Read values each Read statement takes.
+
+class DependencyGraph:
+    def __init__(self, node):
+        self.stmts = [stmt.tok for stmt in node.op_tok4.stmts]
+        self.defs = []
+        self.deps = []
+        self.dependents = [[] for stmt in self.stmts]
+        self.inputs = {}
+
+        last_defs = {}
+        offset = 0
+        for index, stmt in enumerate(self.stmts):
+            uses, defs = self.slots(stmt)
+            deps = sorted({last_defs[slot] for slot in uses if slot in last_defs})
+            for dep in deps:
+                self.dependents[dep].append(index)
+            for slot in defs:
+                last_defs[slot] = index
+            self.defs.append(defs)
+            self.deps.append(deps)
+
+            if isinstance(stmt, ReadNode):
+                self.inputs[index] = (offset, len(stmt.slots))
+                offset += len(stmt.slots)
+
+    #This gives the slots a statement uses and the slots it defines.
+    def slots(self, node):
+        uses = []
+        defs = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, AssignNode):
+                stack.append(node.op_tok3)
+                defs.append(node.op_tok.slot)
+            elif isinstance(node, ReadNode):
+                defs.extend(node.slots)
+            elif isinstance(node, WriteNode):
+                stack.append(node.op_tok3)
+            elif isinstance(node, (BinOpNode, VarlOpNode)):
+                stack.append(node.left_node)
+                stack.append(node.right_node)
+            elif isinstance(node, UnaryOpNode):
+                stack.append(node.node)
+            elif isinstance(node, VarNode):
+                uses.append(node.slot)
+            elif isinstance(node, TempStoreNode):
+                stack.append(node.expr)
+                defs.append(node.slot)
+            elif isinstance(node, TempNode):
+                uses.append(node.slot)
+                uses.extend(slot for text, slot in node.traces if slot is not None)
+        return uses, defs
+
+    #This gives the statements that are given and every statement that uses a value made by one of them.
+    def downstream(self, indexes):
+        found = set(indexes)
+        stack = list(found)
+        while stack:
+            for index in self.dependents[stack.pop()]:
+                if index not in found:
+                    found.add(index)
+                    stack.append(index)
+        return found
+
+#A Rerunner runs one Program many times with different Read values, and only works out again the statements
+#whose values can have changed since the last run: the Reads that were given other values and every statement
+#downstream of them. The other statements write the lines they wrote last time, give the value they gave, and
+#put the values they defined back into their slots, so the output is the same as a full run of the program.
+#
+#The statements run as closures from the Compiler, whatever the engine of the Program is. A run that stops with
+#an error keeps nothing for the statements from the one that failed on, because they did not run. A run that
+#stops with an exception, like the EOFError for a missing value, keeps what the run before it kept.
+#executed and reused are the numbers of statements worked out and given again by the last run.
+
+class Rerunner:
+    def __init__(self, program):
+        self.program = program
+        self.graph = None
+        self.codes = []
+        if not program.error:
+            self.graph = DependencyGraph(program.node)
+            compiler = Compiler()
+            self.codes = [compiler.compile(stmt) for stmt in self.graph.stmts]
+        self.inputs = None
+        self.cache = []
+        self.executed = 0
+        self.reused = 0
+
+    #This gives the Read statements that are given other values than in the last run.
+    def changed(self, inputs):
+        if self.inputs is None: return set(self.graph.inputs)
+        return {
+            index for index, (start, count) in self.graph.inputs.items()
+            if inputs[start:start + count] != self.inputs[start:start + count]
+        }
+
+    def run(self, inputs, output=None):
+        inputs = [str(value) for value in inputs]
+        values = iter(inputs)
+
+        #A Read that wants more values than were given fails the run like input() does at the end of a file.
+        def reader(prompt):
+            value = next(values, None)
+            if value is None: raise EOFError('No value left for Read')
+            return value
+
+        execution = Execution(self.program, output, reader)
+        error = execution.start()
+        if error: return None, error
+
+        dirty = self.graph.downstream(self.changed(inputs))
+        cache, results, error = without_gc(self.replay, execution.context, values, dirty)
+
+        self.inputs = inputs
+        self.cache = cache
+        result = RTResult().failure(error) if error else RTResult().success(ValueList(results))
+        return execution.finish(result)
+
+    #This function runs the statements in order. The cache it gives back keeps, for every statement that ran to its
+    #end, the lines it wrote, its value, and the values of the slots it defined. It keeps many small objects, so it
+    #runs with the garbage collector paused, like the ProgramCache does.
+    def replay(self, context, values, dirty):
+        graph = self.graph
+        slots = context.slots
+        sink = context.output
+        capture = context.output = MemorySink()
+
+        cache = []
+        results = []
+        executed = reused = 0
+        error = None
+        try:
+            for index, code in enumerate(self.codes):
+                if index < len(self.cache) and index not in dirty:
+                    lines, value, defs = self.cache[index]
+                    for line in lines:
+                        sink.write(line)
+                    for slot, number in defs:
+                        slots[slot] = number
+                    if index in graph.inputs:
+                        for skipped in range(graph.inputs[index][1]): next(values, None)
+                    cache.append(self.cache[index])
+                    results.append(value)
+                    reused += 1
+                    continue
+
+                try:
+                    value = code(context)
+                except RTFailure as failure:
+                    error = failure.error
+                lines = capture.lines
+                capture.lines = []
+                for line in lines:
+                    sink.write(line)
+                executed += 1
+                if error: break
+
+                cache.append((lines, value, [(slot, slots[slot]) for slot in graph.defs[index]]))
+                results.append(value)
+        finally:
+            context.output = sink
+
+        self.executed = executed
+        self.reused = reused
+        return cache, results, error
+
+#######################################
+# INCREMENTAL PARSER
+#######################################
+
+#The incremental parser keeps the tokens and parse tree of a program that is being edited, so an edit only lexes
+#and parses the statements it touches again. The text is split into chunks that end after every semicolon: the
+#first chunk is the program name and PROG_START, the chunks after it are the statements, and the last ones are
+#PROG_END and the end of the text. Every chunk keeps its own part of the text. The lexer starts over after every
+#semicolon, so an edit is lexed from the start of its chunk until it gets to a semicolon that ends where an old
+#chunk ended, and only the chunks in between are made again. Every chunk that is a statement is parsed on its
+#own when it is made.
+#
+#The chunks after an edit are moved by the length the edit added or removed. The start of every chunk is kept
+#in a list, and the move is only written to the part of the list between the last edit and this one, so edits
+#close to each other do not touch the whole list. The tokens and nodes of a chunk are only moved when they are
+#needed, which is when an error is found in the chunk or the whole tree is asked for.
+#
+#The error is the same one parse_program() gives for the text: the first illegal character, or else the error
+#the Parser finds. The Parser is run again from the first chunk that is not a good statement, which is PROG_END
+#when the program has no errors, so it only reads a few tokens.
+#
+#All of the tokens share one DocumentSource, which joins the text of the chunks the first time it is needed
+#after an edit. The positions of a tree from tree(), and of a Program made from it, are moved by later edits,
+#so a Program should be made again after editing.
+
+STATEMENT_TYPES = (TT_READ, TT_WRITE, TT_IDENT)
+HEADER_TYPES = [TT_IDENT, TT_PROGSTART, TT_SCOLON]
+
+class DocumentSource(Source):
+    __slots__ = ('chunks', 'joined')
+
+    def __init__(self, fn, chunks):
+        self.fn = fn
+        self.chunks = chunks
+        self.joined = None
+        self.newline_offsets = None
+
+    @property
+    def text(self):
+        if self.joined is None:
+            self.joined = ''.join([chunk.text for chunk in self.chunks])
+        return self.joined
+
+    def changed(self):
+        self.joined = None
+        self.newline_offsets = None
+
+class Chunk:
+    def __init__(self, text, offset, tokens, illegal=None):
+        self.text = text
+        self.offset = offset
+        self.tokens = tokens
+        self.illegal = illegal
+        self.node = None
+
+        #A chunk is a good statement when the Parser reads all of its tokens without an error. The Parser can
+        #fail with an exception on some errors, and then the full parse in IncrementalParser.check() fails the
+        #same way.
+        self.valid = False
+        if illegal is None and tokens[0].type in STATEMENT_TYPES:
+            parser = Parser(tokens)
+            try:
+                res = parser.stmt()
+            except AttributeError:
+                return
+            self.node = res.node
+            self.valid = not res.error and parser.tok_idx == len(tokens)
+
+    #The tokens and nodes point at the old offset of the chunk until they are moved to the new one. Nodes share
+    #some positions with their children, so every position is only moved once.
+    def move(self, offset):
+        delta = offset - self.offset
+        if not delta: return
+        self.offset = offset
+        for tok in self.tokens:
+            tok.idx += delta
+        if self.illegal is not None:
+            self.illegal += delta
+        if self.node is not None:
+            move_positions(self.node, delta, set())
+
+def move_positions(node, delta, moved):
+    for value in vars(node).values():
+        if isinstance(value, Position):
+            if id(value) not in moved:
+                moved.add(id(value))
+                value.idx += delta
+                value.anchor += delta
+        elif isinstance(value, list):
+            for item in value:
+                if hasattr(item, '__dict__'): move_positions(item, delta, moved)
+        elif hasattr(value, '__dict__'):
+            move_positions(value, delta, moved)
+
+class IncrementalParser:
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.chunks = []
+        self.starts = []
+        self.source = DocumentSource(fn, self.chunks)
+        self.length = len(text)
+
+        #The starts from index shift_from on are off by shift.
+        self.shift_from = 0
+        self.shift = 0
+
+        #The indexes of the chunks that are not good statements, and of the chunks with illegal characters.
+        self.invalid = []
+        self.illegal = []
+
+        self.relex(0, text, 0, 0)
+        self.error = self.check()
+
+    @property
+    def text(self):
+        return self.source.text
+
+    def start_of(self, index):
+        return self.starts[index] + (self.shift if index >= self.shift_from else 0)
+
+    #This function writes the shift to the starts between shift_from and index, so it only starts at index.
+    def move_shift(self, index):
+        starts = self.starts
+        if index > self.shift_from:
+            starts[self.shift_from:index] = [start + self.shift for start in starts[self.shift_from:index]]
+        elif index < self.shift_from:
+            starts[index:self.shift_from] = [start - self.shift for start in starts[index:self.shift_from]]
+        self.shift_from = index
+
+    #The index of the chunk the offset is in. The starts before shift_from and from it on are both in order.
+    def chunk_at(self, offset):
+        if self.shift_from < len(self.starts) and offset >= self.start_of(self.shift_from):
+            return bisect_right(self.starts, offset - self.shift, self.shift_from) - 1
+        return bisect_right(self.starts, offset, 0, self.shift_from) - 1
+
+    #This function replaces the text from offset to offset + removed with the inserted text, and returns the
+    #error of the new text, or None when it has none.
+    def edit(self, offset, removed, inserted):
+        if not 0 <= offset <= offset + removed <= self.length:
+            raise ValueError(f'Edit of {removed} characters at {offset} is outside the text')
+
+        first = self.chunk_at(offset)
+        last = self.chunk_at(offset + removed - 1) if removed else first
+        start = self.start_of(first)
+        old = ''.join([chunk.text for chunk in self.chunks[first:last + 1]])
+        text = old[:offset - start] + inserted + old[offset + removed - start:]
+
+        delta = len(inserted) - removed
+        self.relex(first, text, last + 1, delta)
+        self.length += delta
+        self.source.changed()
+        self.error = self.check()
+        return self.error
+
+    #The tokens of the text, which starts at offset, with an IllegalCharError in place of every illegal character.
+    def lex_from(self, text, offset):
+        lexer = RegexLexicalAnalyzer(self.fn, text, self.source)
+        start = 0
+        while True:
+            try:
+                for tok in lexer.iter_tokens(start):
+                    tok.idx += offset
+                    yield tok
+                return
+            except LexFailure as failure:
+                start = failure.error.pos_start.idx + 1
+                yield IllegalCharError(Position(failure.error.pos_start.idx + offset, self.source),
+                                       Position(start + offset, self.source), failure.error.details)
+
+    #This function lexes the text that replaces the chunks from index up to end, and makes the chunks again. When
+    #the text does not end with a semicolon that the lexer finds, the next chunk is lexed with it too, until
+    #there is one or the text ends. The chunks after that moved by delta.
+    def relex(self, index, text, end, delta):
+        count = len(self.chunks)
+        offset = self.start_of(index) if index < count else 0
+        chunks = []
+
+        while True:
+            tokens = []
+            illegal = None
+            chunk_start = 0
+            done = False
+
+            for tok in self.lex_from(text, offset):
+                if isinstance(tok, IllegalCharError):
+                    if illegal is None: illegal = tok.pos_start.idx
+                    continue
+
+                tokens.append(tok)
+                if tok.type == TT_EOF:
+                    if end == count:
+                        chunks.append(Chunk(text[chunk_start:], offset + chunk_start, tokens, illegal))
+                        done = True
+                    break
+
+                if tok.type == TT_SCOLON:
+                    chunk_end = tok.idx + 1 - offset
+                    chunks.append(Chunk(text[chunk_start:chunk_end], offset + chunk_start, tokens, illegal))
+                    tokens, illegal, chunk_start = [], None, chunk_end
+                    if chunk_end == len(text) and end < count:
+                        done = True
+                        break
+
+            if done: break
+            text = text[chunk_start:] + self.chunks[end].text
+            offset += chunk_start
+            end += 1
+
+        self.move_shift(end)
+        self.shift += delta
+        self.chunks[index:end] = chunks
+        self.starts[index:end] = [chunk.offset for chunk in chunks]
+        self.shift_from = index + len(chunks)
+
+        grow = len(chunks) - (end - index)
+        self.invalid = splice_indexes(self.invalid, index, end, grow,
+                                      [index + i for i, chunk in enumerate(chunks) if not chunk.valid])
+        self.illegal = splice_indexes(self.illegal, index, end, grow,
+                                      [index + i for i, chunk in enumerate(chunks) if chunk.illegal is not None])
+
+    def tokens_from(self, index):
+        for i in range(index, len(self.chunks)):
+            chunk = self.chunks[i]
+            chunk.move(self.start_of(i))
+            yield from chunk.tokens
+
+    #This function parses from the first chunk after the program name that is not a good statement to the end,
+    #the same way Parser.program() does after the statements before it. It returns the error, the index of
+    #that chunk, the statements parsed from it, and the nodes of PROG_END and its semicolon.
+    def parse_rest(self):
+        index = next(i for i in self.invalid if i > 0)
+        parser = Parser(self.tokens_from(index))
+        res = ParseResult()
+        stmts = []
+
+        if index == 1: stmts.append(res.register(parser.stmt()))
+        while not res.error and parser.current_tok.type in STATEMENT_TYPES:
+            stmts.append(res.register(parser.stmt()))
+        end = [res.register(parser.prog_end()), res.register(parser.semicolon())]
+
+        if not res.error and parser.current_tok.type != TT_EOF:
+            res.failure(TrailingInputError(parser.current_tok.pos_start, parser.current_tok.pos_end, "Input Error"))
+        return res.error, index, stmts, end
+
+    #A program name or PROG_START with an error is parsed again from the start, like parse_program() does. An
+    #illegal character is found even when the Parser would have failed with an exception before getting to it.
+    def check(self):
+        if self.illegal:
+            index = self.illegal[0]
+            chunk = self.chunks[index]
+            chunk.move(self.start_of(index))
+            return IllegalCharError(Position(chunk.illegal, self.source), Position(chunk.illegal + 1, self.source),
+                                    "'" + chunk.text[chunk.illegal - chunk.offset] + "'")
+
+        if [tok.type for tok in self.chunks[0].tokens] != HEADER_TYPES:
+            return Parser(self.tokens_from(0)).parse().error
+        return self.parse_rest()[0]
+
+    #This function gives the parse tree and error of the text, like parse_program() does.
+    def tree(self):
+        if self.error: return None, self.error
+
+        error, index, stmts, end = self.parse_rest()
+        for i, chunk in enumerate(self.chunks):
+            chunk.move(self.start_of(i))
+
+        header = self.chunks[0].tokens
+        stmts = [chunk.node for chunk in self.chunks[1:index]] + stmts
+        return ProgramNode(ProgramNameNode(header[0]), ProgramStartNode(header[1]), SemicolonNode(header[2]),
+                           BlockNode(stmts), *end), None
+
+    def program(self, engine='tree', optimize=False):
+        return Program(self.fn, self.text, engine, optimize, parsed=self.tree())
+
+#The indexes before start stay, the ones from start to end are replaced by the new ones, and the ones after end
+#move by grow.
+def splice_indexes(indexes, start, end, grow, new):
+    return [index for index in indexes if index < start] + new + [index + grow for index in indexes if index >= end]
 
-    # Run program
-    interpreter = Interpreter()
+#######################################
+# STREAMING
+#######################################
+
+#Streaming runs a program while its text is still coming in, like from a pipe, and keeps only a little of the text
+#in memory. Every statement is parsed and run as soon as its semicolon is read, and then dropped.
+#
+#The stream source keeps the text in segments that each start at a new line character, or at the start of the
+#text, and know the line they start on, so positions in them are shown the same way as from a full Source. The
+#last segment is the window: the text from the line the next statement starts on to the end of what was read.
+#The segments before it are the lines that the Numbers kept in variables point at, because a division by zero
+#can point at a Number that was made many statements before. Everything else that was read is dropped.
+
+class StreamSegment:
+    __slots__ = ('start', 'line', 'text', 'newline_offsets')
+
+    def __init__(self, start, line, text):
+        self.start = start
+        self.line = line
+        self.text = text
+        self.newline_offsets = [start + match.start() for match in re.finditer('\n', text)]
+
+    @property
+    def end(self):
+        return self.start + len(self.text)
+
+    def append(self, text):
+        end = self.end
+        self.newline_offsets.extend(end + match.start() for match in re.finditer('\n', text))
+        self.text += text
+
+class StreamSource(Source):
+    __slots__ = ('segments', 'starts')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.segments = [StreamSegment(0, 0, '')]
+        self.starts = [0]
+        self.newline_offsets = None
+
+    #The text of the source can be sliced with the offsets of the whole text, as long as the slice starts in a
+    #segment that is kept.
+    @property
+    def text(self):
+        return self
+
+    def __getitem__(self, key):
+        segment = self.segment(key.start)
+        stop = None if key.stop is None else key.stop - segment.start
+        return segment.text[key.start - segment.start:stop]
+
+    @property
+    def window(self):
+        return self.segments[-1]
+
+    def segment(self, idx):
+        return self.segments[max(bisect_right(self.starts, idx) - 1, 0)]
+
+    def last_newline(self, idx):
+        newlines = self.segment(idx).newline_offsets
+        index = bisect_left(newlines, idx)
+        return newlines[index - 1] if index else -1
+
+    def next_newline(self, idx):
+        segment = self.segment(idx)
+        newlines = segment.newline_offsets
+        index = bisect_left(newlines, idx)
+        return newlines[index] if index < len(newlines) else segment.end
+
+    def line(self, idx):
+        segment = self.segment(idx)
+        return segment.line + bisect_left(segment.newline_offsets, idx)
+
+    #This function drops the text before the line of offset, except the lines the numbers point at.
+    def compact(self, offset, numbers):
+        window = self.window
+        cut = max(self.last_newline(offset), window.start)
+
+        spans = []
+        for number in numbers:
+            start = min(number.pos_start.idx, number.pos_start.anchor)
+            if start >= cut: continue
+            end = max(number.pos_end.idx, number.pos_end.anchor)
+            segment = self.segment(start)
+            spans.append([max(self.last_newline(start), segment.start), min(self.next_newline(end) + 1, segment.end)])
+
+        #The lines of a Number that go past the cut are kept in the window.
+        moved = True
+        while moved:
+            moved = False
+            for start, end in spans:
+                if start < cut < end:
+                    cut = start
+                    moved = True
+
+        kept = []
+        for start, end in sorted(span for span in spans if span[1] <= cut):
+            if kept and start < kept[-1][1]:
+                kept[-1][1] = max(kept[-1][1], end)
+            else:
+                kept.append([start, end])
+
+        segments = [StreamSegment(start, self.line(start), self[start:end]) for start, end in kept]
+        segments.append(StreamSegment(cut, self.line(cut), self[cut:window.end]))
+        self.segments = segments
+        self.starts = [segment.start for segment in segments]
+
+#The stream lexer reads the stream a chunk at a time and lexes the text up to the last semicolon it has, with the
+#RegexLexicalAnalyzer, which starts over after every semicolon the same way it does for the IncrementalParser.
+#Text after the last semicolon waits for the next chunk, because a token in it can go on in the next chunk. A
+#stream of bytes, like sys.stdin.buffer, is read with read1(), which gives back what is there without waiting
+#for the whole chunk, and is decoded as UTF-8 with the new lines made '\n' like open() makes them.
+#
+#keep() is told where the next statement starts and which slots the program keeps its variables in, so the
+#text before that statement can be dropped, except the lines those Numbers point at.
+
+class StreamLexer:
+    def __init__(self, fn, stream, chunk_size=65536):
+        self.fn = fn
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.source = StreamSource(fn)
+        self.lexed = 0
+        self.keep_from = 0
+        self.slots = ()
+        self.eof = False
+        self.decoder = None
+        if hasattr(stream, 'read1'):
+            self.decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), True)
+
+    def read(self):
+        if self.decoder is None: return self.stream.read(self.chunk_size)
+        data = self.stream.read1(self.chunk_size)
+        return self.decoder.decode(data, final=not data)
+
+    def keep(self, offset, slots):
+        self.keep_from = offset
+        self.slots = slots
+
+    #This function reads one more chunk, and returns False at the end of the stream.
+    def fill(self, compact=True):
+        if compact:
+            self.source.compact(self.keep_from, [number for number in self.slots
+                                                 if number is not None and number.pos_start is not None])
+        text = self.read()
+        while text == '' and self.decoder is not None and not self.eof:
+            #A byte stream can give back only part of a character, which decodes to nothing yet.
+            data = self.stream.read1(self.chunk_size)
+            if not data: break
+            text = self.decoder.decode(data)
+        if not text:
+            self.eof = True
+            return False
+        self.source.window.append(text)
+        return True
+
+    #This function reads until the line that idx is on is whole, so an error on it can be shown.
+    def finish_line(self, idx):
+        while not self.eof and self.source.next_newline(idx) == self.source.window.end:
+            self.fill(compact=False)
+
+    def iter_tokens(self):
+        source = self.source
+        while True:
+            window = source.window
+            start = self.lexed - window.start
+            end = len(window.text) if self.eof else window.text.rfind(';', start) + 1
+
+            if end > start or self.eof:
+                lexer = RegexLexicalAnalyzer(self.fn, window.text[:end], source)
+                try:
+                    for tok in lexer.iter_tokens(start):
+                        if tok.type == TT_EOF and not self.eof: break
+                        tok.idx += window.start
+                        yield tok
+                except LexFailure as failure:
+                    error = failure.error
+                    error.pos_start = Position(error.pos_start.idx + window.start, source)
+                    error.pos_end = Position(error.pos_end.idx + window.start, source)
+                    raise
+                if self.eof: return
+                self.lexed = window.start + end
+
+            self.fill()
+
+#The stream parser does not read the token after a semicolon until it is asked for, so the statement that the
+#semicolon ends can run before the next one is read.
+
+class StreamParser(Parser):
+    def __init__(self, tokens):
+        self.tok = None
+        self.pending = False
+        super().__init__(tokens)
+
+    def advance(self):
+        self.tok_idx += 1
+        self.pending = True
+
+    @property
+    def current_tok(self):
+        if self.pending:
+            self.pending = False
+            tok = next(self.tokens, None)
+            if tok is not None: self.tok = tok
+        return self.tok
+
+    #This gives the offset right after the last token that was read.
+    def read_to(self):
+        return self.tok.idx + 1
+
+#This function runs a program from a stream, a statement at a time. The stream is a file object, opened in
+#text or binary mode, and the other arguments are the ones of run(). The statements are resolved one at a time,
+#and a new variable gets its slot when the first statement that uses it comes. on_value is called with the value
+#of every statement, which is not kept. It returns the number of statements that ran and the error.
+#
+#A program with an error before its first statement writes what run() writes for it, because nothing has run
+#yet. After that, the statements before an error have already run and written their lines when the error is
+#found, and an illegal character is only found when it is read. That is true of tokens after PROG_END; too: run()
+#writes nothing for them, but here the welcome line and the lines of every statement are already written. The error that is given back is the one the
+#Parser gives for the same text, which is the last of the errors Parser.program() finds.
+
+def run_stream(fn, stream, engine='tree', output=None, reader=None, symbol_table=None, on_value=None,
+               chunk_size=65536):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+
+    output = output if output is not None else StdoutSink()
+    lexer = StreamLexer(fn, stream, chunk_size)
+    symbol_table = symbol_table if symbol_table is not None else make_symbol_table()
+    resolver = Resolver()
     context = Context('<program>')
-    context.symbol_table = global_symbol_table
-    result = interpreter.visit(ast.node, context)
-
-    '''
-    global_symbol_table.set('Five', 5)
-    global_symbol_table.set('Three', 3)
-    global_symbol_table.set('Two', 2)
-    global_symbol_table.set('One', 1)
-    
-    
-    print(global_symbol_table.get('Five'))
-    print(global_symbol_table.get('Three'))
-    print(global_symbol_table.get('Two'))
-    print(global_symbol_table.get('One'))
-    '''
-    
-    
-    return result.value, result.error
-    
\ No newline at end of file
+    context.symbol_table = symbol_table
+    context.slots = []
+    context.output = output
+    context.input = reader or input
+
+    count = 0
+    try:
+        tokens = lexer.iter_tokens()
+        parser = StreamParser(tokens)
+        res = ParseResult()
+        res.register(parser.prog_name())
+        res.register(parser.prog_start())
+        res.register(parser.semicolon())
+
+        #Nothing runs when the start of the program is wrong, so the rest is only read, to find the error the
+        #Parser would give and any illegal character after it.
+        if res.error:
+            stmts = ParseResult()
+            stmts.register(parser.stmt())
+            while not stmts.error and parser.current_tok.type in STATEMENT_TYPES:
+                stmts.register(parser.stmt())
+            res.register(stmts)
+            res.register(parser.prog_end())
+            res.register(parser.semicolon())
+            error = res.error
+            for tok in tokens:
+                lexer.keep(tok.idx, [error])
+            output.write('Welcome to the DustyDevil Programming Language! \n')
+            lexer.finish_line(error.pos_end.idx)
+            output.flush()
+            return count, error
+
+        output.write('Welcome to the DustyDevil Programming Language! \n')
+
+        #The first statement is parsed whatever its first token is, like Parser.stmts() does.
+        error = None
+        first = True
+        while first or parser.current_tok.type in STATEMENT_TYPES:
+            first = False
+            res = parser.stmt()
+            if res.error: break
+
+            stmt = res.node
+            resolver.visit(stmt.tok)
+            context.slots.extend(symbol_table.load(resolver.names[len(context.slots):]))
+
+            if engine == 'closure':
+                result = CompiledProgram(stmt).run(context)
+            elif engine == 'vm':
+                result = VirtualMachine().run(BytecodeCompiler().compile_statement(stmt, resolver.names), context)
+            else:
+                result = Interpreter().visit(stmt, context)
+
+            count += 1
+            if result.error:
+                error = result.error
+                break
+            if on_value is not None: on_value(result.value)
+            lexer.keep(parser.read_to(), context.slots)
+
+        if error is None:
+            res.register(parser.prog_end())
+            res.register(parser.semicolon())
+            if not res.error and parser.current_tok.type != TT_EOF:
+                res.failure(TrailingInputError(parser.current_tok.pos_start, parser.current_tok.pos_end,
+                                               "Input Error"))
+            error = res.error
+    except LexFailure as failure:
+        error = failure.error
+
+    #A Number that was read has no position, so an error on it has none either.
+    if error is not None and error.pos_end is not None:
+        lexer.finish_line(error.pos_end.idx)
+    symbol_table.store(resolver.names, context.slots)
+    output.flush()
+    return count, error
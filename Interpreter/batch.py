@@ -0,0 +1,220 @@
+#######################################
+# IMPORTS
+#######################################
+
+#Batch mode needs numpy, but the rest of the interpreter does not, so it is only imported here.
+import numpy as np
+
+from DustyDevilInterpreterGarcia import *
+
+#######################################
+# BATCH RESULT
+#######################################
+
+#Batch mode runs one program over many rows of Read inputs at the same time. Every value in the program is a
+#numpy column with one entry per row, so every BinOpNode is one array operation for all of the rows.
+#
+#The inputs are given in the order the program reads them, the same order the values would be typed for
+#input(): column k of the inputs is the k-th value read. Every expression of every Write gives one output
+#column. A division by zero does not stop the batch. Only the rows where the divisor is zero fail, and the
+#outputs of a failed row are masked from the place it failed on, like the program would have stopped there.
+
+class BatchResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.columns = []
+        self.failed = np.zeros(rows, dtype=bool)
+        self.error_index = np.full(rows, -1)
+        self.errors = []
+
+    def add_column(self, label, values):
+        values = np.broadcast_to(values, (self.rows,))
+        self.columns.append((label, np.ma.masked_array(values, mask=self.failed.copy())))
+
+    def column(self, label):
+        for column_label, values in self.columns:
+            if column_label == label: return values
+        raise KeyError(label)
+
+    #The error of a failed row, or None if the row did not fail.
+    def error(self, row):
+        index = self.error_index[row]
+        return self.errors[index] if index >= 0 else None
+
+    def __repr__(self):
+        labels = ', '.join(label for label, values in self.columns)
+        return f'<BatchResult rows={self.rows} columns=[{labels}] failed={int(self.failed.sum())}>'
+
+#######################################
+# BATCH NUMBER
+#######################################
+
+#A BatchNumber is the column of values a Number would have had in every row. It keeps the position and context
+#the Number would have had too, and is shared by the variables it is assigned to the same way, so a division by
+#zero reports the same place as the other engines, even after a unary + moved the Number of a variable.
+
+class BatchNumber:
+    def __init__(self, values, context=None):
+        self.values = values
+        self.context = context
+        self.set_pos()
+
+    def set_pos(self, pos_start=None, pos_end=None):
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+        return self
+
+    def __repr__(self):
+        return f'<BatchNumber {self.values}>'
+
+#Read turns every value into an int like the other engines do. Columns that already hold numbers are converted
+#all at once, and int() is only called for every value of the other ones, like columns of strings.
+def int_column(values):
+    if values.dtype.kind in 'iub': return values.astype(np.int64)
+    if values.dtype.kind == 'f':
+        if not np.isfinite(values).all():
+            raise ValueError(f'cannot convert {values[~np.isfinite(values)][0]} to an integer')
+        return np.trunc(values).astype(np.int64)
+    return np.array([int(value) for value in values], dtype=np.int64)
+
+#######################################
+# BATCH INTERPRETER
+#######################################
+
+class BatchInterpreter:
+    def __init__(self, inputs, rows):
+        self.inputs = inputs
+        self.next_input = 0
+        self.symbols = {'null': BatchNumber(np.int64(0))}
+        self.result = BatchResult(rows)
+
+    def visit(self, node, context):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node, context)
+
+    def no_visit_method(self, node, context):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    ###################################
+
+    def visit_ProgramNode(self, node, context):
+        self.visit(node.op_tok4, context)
+
+    def visit_BlockNode(self, node, context):
+        for stmt in node.stmts:
+            self.visit(stmt, context)
+
+    def visit_StmtsOpNode(self, node, context):
+        self.visit(node.left_node, context)
+        self.visit(node.right_node, context)
+
+    def visit_StmtNode(self, node, context):
+        self.visit(node.tok, context)
+
+    def visit_NumberNode(self, node, context):
+        value = node.tok.value
+        value = np.float64(value) if isinstance(value, float) else np.int64(value)
+        return BatchNumber(value, context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_ConstNode(self, node, context):
+        value = node.value
+        value = np.float64(value) if isinstance(value, float) else np.int64(value)
+        return BatchNumber(value, context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_VarNode(self, node, context):
+        var_name = node.var_name_tok.value
+        value = self.symbols.get(var_name)
+
+        if value is None:
+            raise RTFailure(RTError(
+                node.pos_start, node.pos_end,
+                f"'{var_name}' is not defined",
+                context
+            ))
+        return value
+
+    def visit_AssignNode(self, node, context):
+        self.symbols[str(node.op_tok)[1:-1]] = self.visit(node.op_tok3, context)
+
+    def visit_WriteNode(self, node, context):
+        for index, item in enumerate(varl_items(node.op_tok3)):
+            value = self.visit(item, context).values
+            if isinstance(item, VarNode): label = item.var_name_tok.value
+            else: label = f'{node.pos_start.ln + 1}:{index}'
+            self.result.add_column(label, value)
+
+    def visit_ReadNode(self, node, context):
+        for var_name in read_names(node.op_tok3):
+            if self.next_input >= len(self.inputs):
+                raise RTFailure(RTError(
+                    node.pos_start, node.pos_end,
+                    f"No input column for '{var_name}'",
+                    context
+                ))
+            self.symbols[var_name] = BatchNumber(int_column(self.inputs[self.next_input]))
+            self.next_input += 1
+
+    def visit_BinOpNode(self, node, context):
+        left_number = self.visit(node.left_node, context)
+        right_number = self.visit(node.right_node, context)
+        left = left_number.values
+        right = right_number.values
+        op_type = node.op_tok.type
+
+        if op_type == TT_PLUS: value = left + right
+        elif op_type == TT_MINUS: value = left - right
+        elif op_type == TT_MUL: value = left * right
+        else:
+            #Rows that divide by zero are marked as failed with the error they would have stopped on, which is
+            #at the divisor and has the context of the dividend, like Interpreter.evaluate_BinOpNode gives it.
+            result = self.result
+            zero = np.logical_and(right == 0, ~result.failed)
+            if zero.any():
+                result.error_index[zero] = len(result.errors)
+                result.errors.append(RTError(
+                    right_number.pos_start, right_number.pos_end,
+                    'Division by zero',
+                    left_number.context
+                ))
+                result.failed |= zero
+            value = np.true_divide(left, right)
+
+        return BatchNumber(value, left_number.context).set_pos(node.pos_start, node.pos_end)
+
+    #A unary + gives back the same BatchNumber with a new position, like Interpreter.visit_UnaryOpNode.
+    def visit_UnaryOpNode(self, node, context):
+        number = self.visit(node.node, context)
+        if node.op_tok.type == TT_MINUS:
+            return BatchNumber(-number.values, number.context).set_pos(node.pos_start, node.pos_end)
+        return number.set_pos(node.pos_start, node.pos_end)
+
+#######################################
+# RUN BATCH
+#######################################
+
+#This function runs the program once over every row of inputs. The inputs are a 2D array with one row per run
+#and one column per value read. It returns a BatchResult, or the error that stops the whole batch, like a
+#syntax error or a variable that is not defined. Inputs of any other shape raise a ValueError.
+
+def run_batch(fn, text, inputs):
+    inputs = np.asarray(inputs)
+    if inputs.ndim != 2:
+        raise ValueError(f'The inputs must be a 2D array with one row per run, not a {inputs.ndim}D array')
+
+    node, error = parse_program(fn, text)
+    if error: return None, error
+
+    columns = [inputs[:, index] for index in range(inputs.shape[1])]
+
+    interpreter = BatchInterpreter(columns, inputs.shape[0])
+    context = Context('<program>')
+
+    #The failed rows keep going with inf and nan values, so numpy is told not to warn about them.
+    try:
+        with np.errstate(all='ignore'):
+            interpreter.visit(node, context)
+    except RTFailure as failure:
+        return None, failure.error
+
+    return interpreter.result, None
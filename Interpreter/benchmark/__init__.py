@@ -0,0 +1,5 @@
+#The benchmark package makes DustyDevil programs of any size and times the lexer, the parser, and the
+#engines on them. Run it from the Interpreter folder with: python -m benchmark --help
+
+from benchmark.generator import ProgramGenerator, generate_program
+from benchmark.harness import SIZES, benchmark_size, run_benchmark, write_results
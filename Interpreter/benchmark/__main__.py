@@ -0,0 +1,50 @@
+#######################################
+# IMPORTS
+#######################################
+
+import argparse
+import sys
+
+from benchmark.harness import SIZES, LEXERS, run_benchmark, write_results
+import DustyDevilInterpreterGarcia as dd
+
+#######################################
+# COMMAND LINE
+#######################################
+
+#The results are written as JSON to the output file, or to the screen. A short line for every phase is
+#written to stderr while the benchmark runs, so the JSON on stdout stays clean.
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmark',
+                                     description='Time the DustyDevil lexer, parser, and engines.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='statement counts to time')
+    parser.add_argument('--engine', choices=dd.ENGINES, nargs='+', default=['tree'])
+    parser.add_argument('--lexer', choices=LEXERS, default='regex')
+    parser.add_argument('--repeat', type=int, default=3, help='times to run every phase, the best is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--depth', type=int, default=3, help='how deep expressions nest')
+    parser.add_argument('--variables', type=int, default=26, help='how many variable names to use')
+    parser.add_argument('--read-density', type=float, default=0.05, help='share of statements that are Read')
+    parser.add_argument('--write-density', type=float, default=0.1, help='share of statements that are Write')
+    parser.add_argument('--label', help='name to keep with the results, like a version or commit')
+    parser.add_argument('--output', help='file to write the JSON results to')
+    args = parser.parse_args(argv)
+
+    def progress(records):
+        for record in records:
+            print(f"{record['engine']:>8} {record['statements']:>8} {record['phase']:>10} "
+                  f"{record['seconds']:10.4f}s", file=sys.stderr)
+
+    results = run_benchmark(args.sizes, args.engine, args.lexer, args.repeat, args.seed, args.label,
+                            progress, depth=args.depth, variables=args.variables,
+                            read_density=args.read_density, write_density=args.write_density)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            write_results(results, file)
+    else:
+        write_results(results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#######################################
+# IMPORTS
+#######################################
+
+import random
+
+#######################################
+# GENERATOR
+#######################################
+
+#The generator makes valid DustyDevil programs of any size from a seed, so the same settings always give the
+#same program. The settings are:
+#  statements      how many statements go between PROG_START and PROG_END
+#  depth           how deep the operators of an expression can nest
+#  variables       how many different variable names the program uses
+#  read_density    the share of statements that are a Read
+#  write_density   the share of statements that are a Write
+#
+#Every variable is given a value before it is used, and divisions are only by numbers that are not zero, so the
+#programs run to the end. The values a program reads are returned with it, one per Read variable, in order.
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+#Variable names can only have letters, so the number of a variable is written in base 26.
+def variable_name(number):
+    name = ''
+    while True:
+        name = LETTERS[number % 26] + name
+        number //= 26
+        if number == 0: break
+    return 'V' + name
+
+class ProgramGenerator:
+    def __init__(self, seed=0, depth=3, variables=26, read_density=0.05, write_density=0.1):
+        self.random = random.Random(seed)
+        self.depth = depth
+        self.names = [variable_name(number) for number in range(variables)]
+        self.read_density = read_density
+        self.write_density = write_density
+
+    def generate(self, statements):
+        self.defined = []
+        self.defined_set = set()
+        self.inputs = []
+        lines = ['Generated', 'PROG_START;']
+
+        for index in range(statements):
+            choice = self.random.random()
+            if choice < self.read_density or not self.defined:
+                lines.append(self.read())
+            elif choice < self.read_density + self.write_density:
+                lines.append(self.write())
+            else:
+                lines.append(self.assign())
+
+        lines.append('PROG_END;')
+        return '\n'.join(lines) + '\n', self.inputs
+
+    def define(self, var_name):
+        if var_name not in self.defined_set:
+            self.defined_set.add(var_name)
+            self.defined.append(var_name)
+
+    def read(self):
+        var_names = self.random.sample(self.names, self.random.randint(1, min(3, len(self.names))))
+        for var_name in var_names:
+            self.define(var_name)
+            self.inputs.append(self.random.randint(1, 99))
+        return f'Read ( {", ".join(var_names)} );'
+
+    def write(self):
+        count = self.random.randint(1, min(3, len(self.defined)))
+        return f'Write ( {", ".join(self.random.sample(self.defined, count))} );'
+
+    def assign(self):
+        var_name = self.random.choice(self.names)
+        line = f'{var_name} := {self.expr(self.depth)};'
+        self.define(var_name)
+        return line
+
+    def expr(self, depth):
+        if depth == 0 or self.random.random() < 0.3:
+            return self.factor()
+
+        op = self.random.choice('+-*/')
+        left = self.expr(depth - 1)
+        if op == '/':
+            right = str(self.random.randint(1, 9))
+        else:
+            right = self.expr(depth - 1)
+
+        if self.random.random() < 0.2:
+            return f'( {left} {op} {right} )'
+        return f'{left} {op} {right}'
+
+    def factor(self):
+        if self.defined and self.random.random() < 0.6:
+            return self.random.choice(self.defined)
+        return str(self.random.randint(1, 99))
+
+#This function makes one program and the values it reads.
+
+def generate_program(statements, seed=0, depth=3, variables=26, read_density=0.05, write_density=0.1):
+    generator = ProgramGenerator(seed, depth, variables, read_density, write_density)
+    return generator.generate(statements)
@@ -0,0 +1,129 @@
+#######################################
+# IMPORTS
+#######################################
+
+import gc
+import json
+import platform
+import sys
+import time
+
+import DustyDevilInterpreterGarcia as dd
+from benchmark.generator import generate_program
+
+#######################################
+# HARNESS
+#######################################
+
+#The harness times every phase of running a program by itself: lexing the text, parsing the tokens, compiling
+#the parse tree (resolving the slots, and building the closures or bytecode), and interpreting it. Every size
+#is timed a few times and the best time is kept, because the best time is the one with the least noise from
+#the rest of the machine.
+
+SIZES = [10 ** exponent for exponent in range(2, 7)]
+LEXERS = ('regex', 'char')
+
+#The benchmark does not want to time how fast the output is written, so the lines are thrown away.
+
+class NullSink:
+    def write(self, line):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def best_time(func, repeat):
+    best = None
+    result = None
+    for index in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best: best = elapsed
+    return best, result
+
+def lex(text, lexer):
+    if lexer == 'char':
+        return dd.LexicalAnalyzer('<benchmark>', text).make_tokens()
+    return dd.RegexLexicalAnalyzer('<benchmark>', text).make_tokens()
+
+def compile_program(node, engine):
+    dd.Resolver().resolve(node)
+    if engine == 'closure': return dd.CompiledProgram(node)
+    if engine == 'vm': return dd.BytecodeCompiler().compile(node)
+    return node
+
+def interpret(code, node, engine, inputs):
+    values = iter(inputs)
+    context = dd.Context('<program>')
+    context.symbol_table = dd.make_symbol_table()
+    context.slots = [None] * len(node.slot_names)
+    context.output = NullSink()
+    context.input = lambda prompt: str(next(values))
+
+    if engine == 'closure': return code.run(context)
+    if engine == 'vm': return dd.VirtualMachine().run(code, context)
+    return dd.Interpreter().visit(code, context)
+
+#This function times one program size and returns one record for every phase.
+
+def benchmark_size(statements, engine='tree', lexer='regex', repeat=3, seed=0, **settings):
+    text, inputs = generate_program(statements, seed=seed, **settings)
+
+    lex_time, (tokens, error) = best_time(lambda: lex(text, lexer), repeat)
+    if error: raise Exception(error.as_string())
+
+    parse_time, ast = best_time(lambda: dd.Parser(tokens).parse(), repeat)
+    if ast.error: raise Exception(ast.error.as_string())
+
+    compile_time, code = best_time(lambda: compile_program(ast.node, engine), repeat)
+    interpret_time, result = best_time(lambda: interpret(code, ast.node, engine, inputs), repeat)
+    if result.error: raise Exception(result.error.as_string())
+
+    common = {
+        'statements': statements,
+        'bytes': len(text),
+        'tokens': len(tokens),
+        'engine': engine,
+        'lexer': lexer,
+        'seed': seed,
+    }
+    phases = [('lex', lex_time, len(tokens)), ('parse', parse_time, len(tokens)),
+              ('compile', compile_time, statements), ('interpret', interpret_time, statements)]
+
+    records = []
+    for phase, seconds, units in phases:
+        record = dict(common, phase=phase, seconds=seconds)
+        record['per_second'] = units / seconds if seconds else None
+        records.append(record)
+    return records
+
+#This function runs every size and returns the results as a dictionary that can be written as JSON. The
+#environment is kept with the results so runs from different versions and machines can be told apart.
+
+def run_benchmark(sizes=SIZES, engines=('tree',), lexer='regex', repeat=3, seed=0, label=None,
+                  progress=None, **settings):
+    results = []
+    for statements in sizes:
+        for engine in engines:
+            records = benchmark_size(statements, engine, lexer, repeat, seed, **settings)
+            results.extend(records)
+            if progress: progress(records)
+
+    return {
+        'label': label,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'settings': dict(settings, seed=seed, repeat=repeat, lexer=lexer),
+        'results': results,
+    }
+
+def write_results(results, file=None):
+    json.dump(results, file or sys.stdout, indent=2)
+    (file or sys.stdout).write('\n')
@@ -0,0 +1,75 @@
+#######################################
+# IMPORTS
+#######################################
+
+#The client does not import the interpreter, so it starts as fast as python can. The daemon has it loaded.
+import argparse
+import json
+import os
+import socket
+import sys
+
+#######################################
+# CLIENT
+#######################################
+
+#The client sends one program to the daemon and writes what comes back the way shell.py does: every line to the
+#output file and to the screen, then the result or the error. The values for the Reads are the lines of stdin,
+#read all at once before the program is sent, so they should be piped in like they are for shell.py.
+#
+#A request is one JSON object written to the socket, and the client then closes its side so the daemon knows it
+#has the whole request. The answer is one JSON object with the lines, the result, and the error.
+
+def socket_path():
+    return os.environ.get('DUSTYDEVIL_SOCKET') or f'/tmp/dustydevil-{os.getuid()}.sock'
+
+def send_request(request, path=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path or socket_path())
+        connection.sendall(json.dumps(request).encode())
+        connection.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = connection.recv(65536)
+            if not chunk: break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python client.py', description='Run a DustyDevil program on the daemon.')
+    parser.add_argument('program', nargs='?', default='DustyDevil+.in.txt')
+    parser.add_argument('--output', default='DustyDevil+.out.txt', help='file the output is written to')
+    parser.add_argument('--socket', help='socket of the daemon, $DUSTYDEVIL_SOCKET or one in /tmp by default')
+    parser.add_argument('--engine', default='tree')
+    parser.add_argument('--optimize', action='store_true')
+    parser.add_argument('--stats', action='store_true', help='show the stats of the daemon instead of running')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.stats:
+            print(json.dumps(send_request({'command': 'stats'}, args.socket), indent=2))
+            return
+
+        with open(args.program) as file:
+            text = file.read()
+        inputs = [line.strip() for line in sys.stdin if line.strip()]
+        response = send_request({
+            'fn': args.program,
+            'text': text,
+            'inputs': inputs,
+            'engine': args.engine,
+            'optimize': args.optimize,
+        }, args.socket)
+    except OSError as exception:
+        print(f'Could not reach the DustyDevil daemon: {exception}', file=sys.stderr)
+        sys.exit(2)
+
+    lines = response['lines'] + [response['error'] if response['error'] else response['result']]
+    with open(args.output, 'w') as file:
+        for line in lines:
+            file.write(line + '\n')
+            sys.stdout.write(line + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#######################################
+# IMPORTS
+#######################################
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+from collections import OrderedDict
+
+import DustyDevilInterpreterGarcia as dd
+from client import socket_path
+
+#######################################
+# PROGRAM CACHE
+#######################################
+
+#The daemon keeps the programs it has compiled, so a program that is sent again is only executed. When there are
+#more programs than the size, the one that was used the longest time ago is dropped.
+
+class ProgramLRU:
+    def __init__(self, size=128):
+        self.size = size
+        self.programs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fn, text, engine='tree', optimize=False):
+        key = (fn, hashlib.sha256(text.encode()).digest(), engine, optimize)
+        program = self.programs.get(key)
+        if program is not None:
+            self.hits += 1
+            self.programs.move_to_end(key)
+            return program
+
+        self.misses += 1
+        program = dd.Program(fn, text, engine, optimize)
+        self.programs[key] = program
+        if len(self.programs) > self.size:
+            self.programs.popitem(last=False)
+        return program
+
+#######################################
+# DAEMON
+#######################################
+
+#The daemon stays up and runs the programs that clients send it over a Unix socket, so the clients do not pay for
+#starting python, importing the interpreter, and parsing the program every time. The programs run with
+#run_async() on one event loop, and every request is its own Execution, so requests never share variables.
+#The requests and answers are the ones described in client.py. A request with "command": "stats" gets the
+#number of requests and the hits and misses of the program cache instead.
+
+def error_response(error):
+    return {'lines': [], 'result': None, 'error': error}
+
+class Daemon:
+    def __init__(self, path=None, cache_size=128):
+        self.path = path or socket_path()
+        self.programs = ProgramLRU(cache_size)
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        try:
+            request = json.loads(await reader.read())
+            response = await self.answer(request)
+        except Exception as exception:
+            response = error_response(f'{type(exception).__name__}: {exception}')
+
+        #A client that went away before the answer was written does not get one.
+        try:
+            writer.write(json.dumps(response).encode())
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def answer(self, request):
+        if request.get('command') == 'stats':
+            return {
+                'requests': self.requests,
+                'programs': len(self.programs.programs),
+                'hits': self.programs.hits,
+                'misses': self.programs.misses,
+            }
+
+        self.requests += 1
+        engine = request.get('engine', 'tree')
+        program = self.programs.get(request.get('fn', '<daemon>'), request['text'], engine,
+                                    bool(request.get('optimize')))
+
+        lines = []
+        values = iter(request.get('inputs', []))
+
+        #A Read that wants more values than were sent fails the request like input() does at the end of a file.
+        async def read(prompt):
+            value = next(values, None)
+            if value is None: raise EOFError('No value left for Read')
+            return str(value)
+
+        async def write(line):
+            lines.append(line)
+
+        try:
+            value, error = await dd.run_async(program, read, write)
+        except EOFError as exception:
+            return {'lines': lines, 'result': None, 'error': f'EOFError: {exception}'}
+
+        return {
+            'lines': lines,
+            'result': None if error else str(value),
+            'error': error.as_string() if error else None,
+        }
+
+    #The socket can only be used by the user that started the daemon. A socket file that is left from a daemon
+    #that stopped is removed, but one that a running daemon answers on is not, and neither is anything else that
+    #is at the path, like a file given with --socket by mistake.
+    async def serve(self):
+        if os.path.exists(self.path):
+            if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                raise RuntimeError(f'{self.path} is not a socket, so the daemon does not replace it')
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(self.path)
+                    raise RuntimeError(f'A daemon is already running on {self.path}')
+                except ConnectionRefusedError:
+                    os.remove(self.path)
+
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self.handle, self.path)
+        finally:
+            os.umask(umask)
+
+        #SIGTERM stops the daemon the same way as Ctrl-C, so the socket file is removed either way.
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+
+        print(f'DustyDevil daemon listening on {self.path}', file=sys.stderr)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            if os.path.exists(self.path): os.remove(self.path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python daemon.py', description='Keep a DustyDevil interpreter running.')
+    parser.add_argument('--socket', help='socket to listen on, $DUSTYDEVIL_SOCKET or one in /tmp by default')
+    parser.add_argument('--cache-size', type=int, default=128, help='compiled programs to keep')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(Daemon(args.socket, args.cache_size).serve())
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as exception:
+        print(exception, file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
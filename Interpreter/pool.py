@@ -0,0 +1,204 @@
+#######################################
+# IMPORTS
+#######################################
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import DustyDevilInterpreterGarcia as dd
+
+#######################################
+# JOBS
+#######################################
+
+#The pool runs many programs at the same time, one for every core. A job is one program file and the values its
+#Reads are given, one per line of the values file. The jobs come from a folder or from a manifest:
+#
+#  folder     every NAME.in.txt program in it, with the values in NAME.read.txt when that file is there
+#  manifest   one job per line: the program file and, after a space, the values file. Paths are from the
+#             folder of the manifest, and lines starting with # are skipped
+#
+#The results come back in the order of the jobs, no matter which job finishes first.
+
+PROGRAM_SUFFIX = '.in.txt'
+VALUES_SUFFIX = '.read.txt'
+
+class Job:
+    def __init__(self, program, values=None):
+        self.program = program
+        self.values = values
+
+    def __repr__(self):
+        return f'<Job {self.program}>'
+
+def jobs_from_folder(folder):
+    jobs = []
+    for program in sorted(glob.glob(os.path.join(folder, '*' + PROGRAM_SUFFIX))):
+        values = program[:-len(PROGRAM_SUFFIX)] + VALUES_SUFFIX
+        jobs.append(Job(program, values if os.path.exists(values) else None))
+    return jobs
+
+def jobs_from_manifest(manifest):
+    folder = os.path.dirname(manifest)
+    jobs = []
+    with open(manifest) as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+            paths = line.split(None, 1)
+            values = os.path.join(folder, paths[1].strip()) if len(paths) > 1 else None
+            jobs.append(Job(os.path.join(folder, paths[0]), values))
+    return jobs
+
+def find_jobs(path):
+    if os.path.isdir(path): return jobs_from_folder(path)
+    return jobs_from_manifest(path)
+
+#######################################
+# WORKER
+#######################################
+
+#Every worker is a process that stays up for all of the jobs it is given, so the interpreter is imported once
+#per worker. Programs are compiled once per worker too, and a job with a program the worker has run before
+#only executes it. Every job is its own Execution, so no job sees the variables of another one.
+
+class JobResult:
+    def __init__(self, program, lines, result, error, seconds, worker):
+        self.program = program
+        self.lines = lines
+        self.result = result
+        self.error = error
+        self.seconds = seconds
+        self.worker = worker
+
+    def as_dict(self):
+        return {
+            'program': self.program,
+            'lines': self.lines,
+            'result': self.result,
+            'error': self.error,
+            'seconds': self.seconds,
+            'worker': self.worker,
+        }
+
+settings = {'engine': 'tree', 'optimize': False}
+
+def init_worker(engine, optimize):
+    settings['engine'] = engine
+    settings['optimize'] = optimize
+
+@lru_cache(maxsize=256)
+def compile_program(fn, text, engine, optimize):
+    return dd.Program(fn, text, engine, optimize)
+
+#A Read that wants more values than the job has fails the job like input() does at the end of a file.
+#Any other exception, like a file that cannot be opened or a value that is not a number, fails only its job too,
+#so the rest of the jobs still run and are reported.
+def make_reader(values):
+    values = iter(values)
+
+    def reader(prompt):
+        value = next(values, None)
+        if value is None: raise EOFError('No value left for Read')
+        return value
+    return reader
+
+def run_job(job):
+    start = time.perf_counter()
+    output = dd.MemorySink()
+
+    try:
+        with open(job.program) as file:
+            text = file.read()
+        values = []
+        if job.values:
+            with open(job.values) as file:
+                values = [line.strip() for line in file if line.strip()]
+
+        program = compile_program(job.program, text, settings['engine'], settings['optimize'])
+        value, error = program.execute(output, make_reader(values))
+        result = None if error else str(value)
+        error = error.as_string() if error else None
+    except Exception as exception:
+        result, error = None, f'{type(exception).__name__}: {exception}'
+
+    return JobResult(job.program, output.lines, result, error, time.perf_counter() - start, os.getpid())
+
+#######################################
+# POOL
+#######################################
+
+#This function runs every job over a pool of processes and returns the results in the order of the jobs, with
+#the stats of the whole run. callback is called with every result, in order, as soon as it is ready.
+
+def run_jobs(jobs, workers=None, engine='tree', optimize=False, callback=None):
+    if engine not in dd.ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(dd.ENGINES)}")
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    results = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(engine, optimize)) as executor:
+        for result in executor.map(run_job, jobs, chunksize=chunksize):
+            results.append(result)
+            if callback: callback(result)
+    seconds = time.perf_counter() - start
+
+    stats = {
+        'jobs': len(results),
+        'errors': sum(1 for result in results if result.error),
+        'workers': workers,
+        'seconds': seconds,
+        'jobs_per_second': len(results) / seconds if seconds else None,
+        'job_seconds': sum(result.seconds for result in results),
+        'worker_jobs': {},
+    }
+    for result in results:
+        stats['worker_jobs'][result.worker] = stats['worker_jobs'].get(result.worker, 0) + 1
+    return results, stats
+
+#######################################
+# COMMAND LINE
+#######################################
+
+#The output of every program is written under its name, like shell.py writes it, and the stats go to stderr.
+#With --json, one JSON object is written instead, with every result and the stats.
+
+def print_result(result):
+    print(f'==> {result.program} <==')
+    for line in result.lines:
+        print(line)
+    print(result.error if result.error else result.result)
+    print()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python pool.py', description='Run many DustyDevil programs at once.')
+    parser.add_argument('path', help=f'folder of {PROGRAM_SUFFIX} programs, or a manifest file')
+    parser.add_argument('--workers', type=int, help='processes to use, every core when not given')
+    parser.add_argument('--engine', choices=dd.ENGINES, default='tree')
+    parser.add_argument('--optimize', action='store_true',
+                        help='fold constants and eliminate common subexpressions before running')
+    parser.add_argument('--json', action='store_true', help='write the results and stats as JSON')
+    args = parser.parse_args(argv)
+
+    jobs = find_jobs(args.path)
+    callback = None if args.json else print_result
+    results, stats = run_jobs(jobs, args.workers, args.engine, args.optimize, callback)
+
+    if args.json:
+        json.dump({'results': [result.as_dict() for result in results], 'stats': stats}, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"{stats['jobs']} programs, {stats['errors']} with errors, {stats['workers']} workers, "
+              f"{stats['seconds']:.3f}s, {stats['jobs_per_second']:.1f} programs/s", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
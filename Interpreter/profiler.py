@@ -0,0 +1,75 @@
+#######################################
+# IMPORTS
+#######################################
+
+import argparse
+import json
+import sys
+
+import DustyDevilInterpreterGarcia as dd
+
+#######################################
+# COMMAND LINE
+#######################################
+
+#The profiler runs one program with a Profiler and writes where the time went, as a text report, as JSON, or
+#as folded stacks for a flame graph. The values for the Reads are the lines of stdin, like they are for
+#shell.py, and the program can be run more than once so the times are steadier. The output of the program is
+#not shown unless --show-output is given, and then it goes to stderr so it is not mixed with the report.
+
+def make_reader(values):
+    def reader(prompt):
+        value = next(values, None)
+        if value is None: raise EOFError('No value left for Read')
+        return value
+    return reader
+
+def profile(fn, text, values=(), repeat=1, optimize=False, show_output=False):
+    program = dd.Program(fn, text, optimize=optimize)
+    profiler = dd.Profiler()
+    for run in range(repeat):
+        output = dd.MemorySink()
+        value, error = program.execute(output, make_reader(iter(values)), profiler=profiler)
+        if show_output:
+            for line in output.lines + [error.as_string() if error else str(value)]:
+                print(line, file=sys.stderr)
+    return profiler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python profiler.py',
+                                     description='Show where a DustyDevil program spends its time.')
+    parser.add_argument('program', nargs='?', default='DustyDevil+.in.txt')
+    parser.add_argument('--format', choices=('text', 'json', 'folded'), default='text')
+    parser.add_argument('--output', help='file to write the profile to, the screen by default')
+    parser.add_argument('--repeat', type=int, default=1, help='times to run the program')
+    parser.add_argument('--limit', type=int, default=20, help='rows of every table in the text report')
+    parser.add_argument('--optimize', action='store_true',
+                        help='fold constants and eliminate common subexpressions before running')
+    parser.add_argument('--show-output', action='store_true', help='write the output of the program to stderr')
+    args = parser.parse_args(argv)
+
+    with open(args.program) as file:
+        text = file.read()
+    values = [line.strip() for line in sys.stdin if line.strip()] if not sys.stdin.isatty() else []
+
+    try:
+        profiler = profile(args.program, text, values, args.repeat, args.optimize, args.show_output)
+    except EOFError as exception:
+        print(f'EOFError: {exception}', file=sys.stderr)
+        sys.exit(1)
+
+    if args.format == 'json':
+        report = json.dumps(profiler.as_dict(), indent=2)
+    elif args.format == 'folded':
+        report = profiler.folded()
+    else:
+        report = profiler.report(args.limit)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(report + '\n')
+    else:
+        print(report)
+
+if __name__ == '__main__':
+    main()
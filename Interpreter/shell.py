@@ -22,6 +22,7 @@ BNF rules which are as follow:
 '''
 
 
+import os
 import DustyDevilInterpreterGarcia
 
 #All of the following is marked out because this is what I used to individually test values.
@@ -38,24 +39,27 @@ while True:
 #The following opens the text file containing the input and it passes it through the run function.
 #It outputs the results to the mentioned output file as well to the console.
 #If error, it outputs the errors. 
+#When DUSTYDEVIL_CACHE names a folder, the parsed program is kept there so the next run does not parse it again.
+#Without it, the file is lexed from its bytes with run_file(), so a very large program is not read into memory.
 
 
-text = open("DustyDevil+.in.txt", "r")
-text = text.read()
-result, error = DustyDevilInterpreterGarcia.run("DustyDevil+.in.txt", text)
+cache_dir = os.environ.get("DUSTYDEVIL_CACHE")
+output = DustyDevilInterpreterGarcia.TeeSink(
+    DustyDevilInterpreterGarcia.FileSink("DustyDevil+.out.txt"),
+    DustyDevilInterpreterGarcia.StdoutSink())
+if cache_dir:
+    text = open("DustyDevil+.in.txt", "r")
+    text = text.read()
+    result, error = DustyDevilInterpreterGarcia.run("DustyDevil+.in.txt", text, output=output, cache_dir=cache_dir)
+else:
+    result, error = DustyDevilInterpreterGarcia.run_file("DustyDevil+.in.txt", output=output)
 
 
-#Print to screen
+#Print to screen and to file
 
-if error: print(error.as_string())
-else: print(result)
-
-#Print to file
-
-sourceFile = open("DustyDevil+.out.txt", 'a')
-if error: print(error.as_string(), file = sourceFile)
-else: print(result, file = sourceFile)
+if error: output.write(error.as_string())
+else: output.write(f'{result}')
 #print("\nNumber of tokens: {}".format(len(result)), file = sourceFile)
-sourceFile.close()
+output.close()
 
 #print("\nNumber of tokens: {}".format(len(result)))
\ No newline at end of file
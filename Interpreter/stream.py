@@ -0,0 +1,63 @@
+#######################################
+# IMPORTS
+#######################################
+
+import argparse
+import sys
+
+import DustyDevilInterpreterGarcia as dd
+
+#######################################
+# COMMAND LINE
+#######################################
+
+#The stream runner runs a program while it is piped in, a statement at a time, so a program that is made by
+#another process starts running before it is all written and is never kept in memory as a whole. The program is
+#read from stdin, or from a file when one is given. The values for the Reads cannot come from stdin then, so
+#they are the lines of the --values file. The lines go to the screen, and to the --output file when it is given,
+#and the error is written after them, like shell.py writes it. The values of the statements are not kept, so
+#the number of statements that ran is written to stderr instead.
+
+def make_reader(values):
+    def reader(prompt):
+        value = next(values, None)
+        if value is None: raise EOFError('No value left for Read')
+        return value
+    return reader
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python stream.py',
+                                     description='Run a DustyDevil program as it is piped in.')
+    parser.add_argument('program', nargs='?', help='program file, stdin by default')
+    parser.add_argument('--values', help='file with the values for the Reads, one per line')
+    parser.add_argument('--output', help='file the output is written to as well')
+    parser.add_argument('--engine', choices=dd.ENGINES, default='tree')
+    parser.add_argument('--chunk-size', type=int, default=65536, help='characters read from the program at once')
+    args = parser.parse_args(argv)
+
+    values = []
+    if args.values:
+        with open(args.values) as file:
+            values = [line.strip() for line in file if line.strip()]
+
+    sinks = [dd.StdoutSink()]
+    if args.output: sinks.insert(0, dd.FileSink(args.output))
+    output = dd.TeeSink(*sinks)
+
+    stream = open(args.program, 'rb') if args.program else sys.stdin.buffer
+    try:
+        count, error = dd.run_stream(args.program or '<stdin>', stream, args.engine, output,
+                                     make_reader(iter(values)), chunk_size=args.chunk_size)
+    except EOFError as exception:
+        output.close()
+        print(f'EOFError: {exception}', file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.program: stream.close()
+
+    if error: output.write(error.as_string())
+    output.close()
+    print(f'{count} statements ran', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#######################################
+# IMPORTS
+#######################################
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import DustyDevilInterpreterGarcia as dd
+from benchmark import generate_program
+
+#######################################
+# STRESS
+#######################################
+
+#The stress check runs many programs at the same time on threads in one process and checks every run gives the
+#same output, result, and error it gives when it runs by itself. Half of the runs share their Program with
+#other threads and the rest compile their own, and every program reads a different set of values. A probe runs
+#between them to catch variables left over from other runs. The reader
+#gives up the rest of its turn every time it is called, so the threads switch in the middle of the programs.
+#It prints the runs that did not match and exits with 1 when there are any.
+
+def make_reader(values, switch):
+    values = iter(values)
+
+    def reader(prompt):
+        if switch: time.sleep(0)
+        return str(next(values))
+    return reader
+
+def run_once(program, values, switch=False):
+    output = dd.MemorySink()
+    value, error = program.execute(output, make_reader(values, switch))
+    return output.lines, str(value), error.as_string() if error else None
+
+#The probe writes a variable before it has a value, so it must always stop with an error. If it ran with the
+#variables of another run, the variable would have a value and the probe would not match.
+PROBE = 'Probe\nPROG_START;\nWrite ( Va );\nPROG_END;\n'
+
+def stress(programs=8, runs=192, threads=16, statements=300, engines=dd.ENGINES, seed=0):
+    jobs = []
+    for engine in engines:
+        for number in range(programs):
+            name = f'<program {number}>'
+            text, inputs = generate_program(statements, seed=seed + number)
+            shared = dd.Program(name, text, engine)
+            for run in range(runs // (programs * len(engines))):
+                #Every run reads its own values, so a run that saw another one's variables would not match.
+                values = [value + run for value in inputs]
+                jobs.append((engine, name, text, shared if run % 2 else None, values))
+                jobs.append((engine, '<probe>', PROBE, None, []))
+
+    def job(job):
+        engine, name, text, shared, values = job
+        program = shared or dd.Program(name, text, engine)
+        return run_once(program, values, switch=True)
+
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(job, jobs))
+
+    failures = []
+    for (engine, name, text, shared, values), result in zip(jobs, results):
+        expected = run_once(dd.Program(name, text, engine), values)
+        if result != expected: failures.append((engine, name, values))
+    return len(jobs), failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python stress.py',
+                                     description='Check that programs run on threads do not share state.')
+    parser.add_argument('--programs', type=int, default=8, help='different programs for every engine')
+    parser.add_argument('--runs', type=int, default=192, help='runs over all engines and programs')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--statements', type=int, default=300, help='statements in every program')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    count, failures = stress(args.programs, args.runs, args.threads, args.statements, seed=args.seed)
+    for engine, name, values in failures:
+        print(f'{engine} {name} did not match when it ran on a thread')
+    print(f'{count} runs on {args.threads} threads, {len(failures)} did not match')
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,10 @@
 def string_with_arrows(text, pos_start, pos_end):
     result = ''
 
-    # Calculate indices
-    idx_start = max(text.rfind('\n', 0, pos_start.idx), 0)
-    idx_end = text.find('\n', idx_start + 1)
-    if idx_end < 0: idx_end = len(text)
+    # Calculate indices from the new lines of the source, which are only found once
+    source = pos_start.source
+    idx_start = max(source.last_newline(pos_start.idx), 0)
+    idx_end = source.next_newline(idx_start + 1)
     
     # Generate each line
     line_count = pos_end.ln - pos_start.ln + 1
@@ -21,7 +21,6 @@ def string_with_arrows(text, pos_start, pos_end):
 
         # Re-calculate indices
         idx_start = idx_end
-        idx_end = text.find('\n', idx_start + 1)
-        if idx_end < 0: idx_end = len(text)
+        idx_end = source.next_newline(idx_start + 1)
 
     return result.replace('\t', '')
\ No newline at end of file